@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+"""Tic-tac-toe programmed in old-school AI
+
+Each engine is a module of this package that can also run on its own, e.g.
+`python3 -m tttai.negascout 10`. tttai.engine puts them behind a common
+interface, loaded by name, and `python3 -m tttai` is the command line entry.
+Nothing is imported here so that loading one engine stays cheap.
+"""
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Command line entry of tttai
+
+Usage:
+    python3 -m tttai list
+    python3 -m tttai play negascout mcts --seed 10
+    python3 -m tttai startup
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+
+from tttai import book, engine
+
+# run in a fresh interpreter to time the import and load of an engine
+STARTUP_CODE = """
+import time
+start = time.perf_counter()
+from tttai import engine
+engine.load(%r)
+print(time.perf_counter() - start)
+"""
+
+def load(name, options):
+    "load an engine, the options go only to monte carlo engines that take them"
+    if not issubclass(engine.ENGINES[name][1], engine.MCTSEngine):
+        options = {}
+    return engine.load(name, **options)
+
+def play(xname, oname, budget, options):
+    "auto play tic-tac-toe between two engines, O moves first"
+    engines = {1: load(xname, options)}
+    engines[-1] = engines[1] if oname == xname else load(oname, options)
+    opening = book.load()
+    player = -1
+    board = 0
+    # loop until the game is done
+    while not engine.won(board) and engine.spaces(board):
+        move = book.lookup(opening, board, player) if opening else None
+        if move:
+            board |= engine.mask(move[0], move[1], player)
+            print("\n%s move from book:" % engine.symbol(player))
+            print(engine.show(board))
+            player = -player
+            continue
+        start = time.perf_counter()
+        row, col = engines[player].best_move(board, player, budget)
+        seconds = time.perf_counter() - start
+        board |= engine.mask(row, col, player)
+        print("\n%s move after %d search steps in %.3fs:" %
+              (engine.symbol(player), engines[player].stats.nodes, seconds))
+        print(engine.show(board))
+        player = -player
+    winner = engine.won(board)
+    if not winner:
+        print("\nTied")
+    else:
+        print("\n%s has won" % engine.symbol(winner))
+
+def startup(names, repeat):
+    "print the time to start an interpreter and to import and load each engine"
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(engine.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+    print("%-14s %12s %12s" % ("engine", "load ms", "process ms"))
+    for name in names:
+        loads, totals = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", STARTUP_CODE % name], env=env,
+                                    check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+            totals.append(time.perf_counter() - start)
+            loads.append(float(output))
+        print("%-14s %12.1f %12.1f" % (name, min(loads) * 1000, min(totals) * 1000))
+
+def main():
+    "parse arguments and run the command"
+    parser = argparse.ArgumentParser(prog="tttai", description="tic-tac-toe in old-school AI")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("list", help="list the engines")
+    parser_play = commands.add_parser("play", help="auto play a game between engines")
+    parser_play.add_argument("x", choices=engine.ENGINES, help="engine of X")
+    parser_play.add_argument("o", nargs="?", choices=engine.ENGINES, help="engine of O, same as X if omitted")
+    parser_play.add_argument("--seed", type=int, default=0, help="random seed")
+    parser_play.add_argument("--budget", type=int, help="playouts per move of monte carlo engines")
+    parser_play.add_argument("--table", help="tdlearn value table for monte carlo engines")
+    parser_startup = commands.add_parser("startup", help="measure startup time of engines")
+    parser_startup.add_argument("engines", nargs="*", default=list(engine.ENGINES), help="engines to measure")
+    parser_startup.add_argument("--repeat", type=int, default=5, help="number of runs, the fastest is reported")
+    args = parser.parse_args()
+    if args.command == "list":
+        for name, (module, _) in engine.ENGINES.items():
+            print("%-14s %s" % (name, module))
+    elif args.command == "play":
+        random.seed(args.seed)
+        options = {"table": args.table} if args.table else {}
+        play(args.x, args.o or args.x, args.budget, options)
+    elif args.command == "startup":
+        startup(args.engines, args.repeat)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,10 @@ import copy
 import random
 import sys
 
+from tttai import book, bounds
+from tttai.searchstats import SearchStats
+
 PLAYERS = ["X", "O"]  # maximizer == "X"
-COUNT = 0
 
 class Board:
     """simple tic-tac-toe board"""
@@ -84,36 +86,54 @@ def heuristic_evaluate(board):
             score += int(10**(countx-1))
     return score
 
-evaluate = simple_evaluate
+def distance_evaluate(board):
+    """evaluator preferring faster wins: +10, -10 for someone won, plus one for
+    each empty spot left, 0 for tie. None otherwise"""
+    value = simple_evaluate(board)
+    if value:
+        value += board.spaces() if value > 0 else -board.spaces()
+    return value
+
+evaluate = distance_evaluate
+MATE_DISTANCE = True  # prune lines that cannot end in a faster win than found
 
-def simple_minimax(board, player):
+def simple_minimax(board, player, stats=None, ply=0):
     """player to move one step on the board, find the minimax (best of the worse case) score"""
-    global COUNT
-    COUNT += 1
+    if stats is None:
+        stats = SearchStats()
+    stats.visit(ply)
     assert player in PLAYERS
     opponent = "O" if player == "X" else "X"
     value = evaluate(board)
     if value is not None:
+        stats.terminals += 1
         return value  # exact score of the board
+    stats.expanded += 1
     # possible opponent moves: The worse case scores in different options
-    candscores = [simple_minimax(b, opponent) for b in [board.place(r, c, player) for r in range(3) for c in range(3)] if b]
+    candscores = [simple_minimax(b, opponent, stats, ply+1) for b in [board.place(r, c, player) for r in range(3) for c in range(3)] if b]
     # evaluate the best of worse case scores
     if player == "X":
         return max(candscores)
     else:
         return min(candscores)
 
-def alphabeta(board, player, alpha=-float("inf"), beta=float("inf")):
+def alphabeta(board, player, alpha=-float("inf"), beta=float("inf"), stats=None, ply=0):
     """minimax with alpha-beta pruning. It implies that we expect the score
     should between lowerbound alpha and upperbound beta to be useful
     """
-    global COUNT
-    COUNT += 1
+    if stats is None:
+        stats = SearchStats()
+    stats.visit(ply)
     assert player in PLAYERS
     opponent = "O" if player == "X" else "X"
     value = evaluate(board)
     if value is not None:
+        stats.terminals += 1
         return value  # exact score of the board (terminal nodes)
+    alpha, beta, value = bounds.window(board, player == "X", alpha, beta, tie=False, mate_distance=MATE_DISTANCE)
+    if value is not None:
+        return value  # the score is bounded outside the window
+    stats.expanded += 1
     # minimax search with alpha-beta pruning
     children = filter(None, [board.place(r, c, player) for r in range(3) for c in range(3)])
     if "Heuristic improvement" == False:
@@ -121,17 +141,19 @@ def alphabeta(board, player, alpha=-float("inf"), beta=float("inf")):
         children = sorted(children, key=heuristic_evaluate, reverse=True)
     if player == "X":   # player is maximizer
         value = -float("inf")
-        for child in children:
-            value = max(value, alphabeta(child, opponent, alpha, beta))
+        for n, child in enumerate(children):
+            value = max(value, alphabeta(child, opponent, alpha, beta, stats, ply+1))
             alpha = max(alpha, value)
             if alpha >= beta:
+                stats.cutoff("beta", n)
                 break   # beta cut-off
     else:               # player is minimizer
         value = float("inf")
-        for child in children:
-            value = min(value, alphabeta(child, opponent, alpha, beta))
+        for n, child in enumerate(children):
+            value = min(value, alphabeta(child, opponent, alpha, beta, stats, ply+1))
             beta = min(beta, value)
             if alpha >= beta:
+                stats.cutoff("alpha", n)
                 break   # alpha cut-off
     return value
 
@@ -139,15 +161,22 @@ minimax = alphabeta
 
 def play():
     "auto play tic-tac-toe"
-    global COUNT
+    opening = book.load()
     minimizer = True
     game = Board()
     # loop until the game is done
     while not game.won():
         player = PLAYERS[minimizer]
         opponent = PLAYERS[not minimizer]
-        COUNT = 0
-        candidates = [(b, minimax(b, opponent)) for b in [game.place(r, c, player) for r in range(3) for c in range(3)] if b]
+        move = book.lookup(opening, game, player) if opening else None
+        if move:
+            game = game.place(move[0], move[1], player)
+            minimizer = not minimizer
+            print("\n%s move from book:" % player)
+            print(game)
+            continue
+        stats = SearchStats()
+        candidates = [(b, minimax(b, opponent, stats=stats, ply=1)) for b in [game.place(r, c, player) for r in range(3) for c in range(3)] if b]
         if not candidates:
             break
         random.shuffle(candidates)
@@ -158,7 +187,7 @@ def play():
             game = min(candidates, key=lambda pair: pair[1])[0]
         # print board and switch
         minimizer = not minimizer
-        print("\n%s move after %d search steps:" % (player, COUNT))
+        print("\n%s move after %d search steps:" % (player, stats.nodes))
         print(game)
     # show result
     winner = game.won()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Batch analysis of positions read from a file or stdin
+
+Each input line is a position of 9 row-major cells of X, O or . followed by
+the side to move, e.g. "XX..O.... O". Blank lines and lines starting with #
+are skipped. Each output line repeats the position and adds the exact minimax
+value (+10 for X wins, -10 for O wins, 0 for tie) and all best moves as
+row,col, e.g. "XX..O.... O 0 0,2". Positions are solved in chunks by worker
+processes, each keeping its transposition table (CACHE of bitalphabeta.py)
+across chunks, and results are written in input order as chunks finish.
+
+Usage:
+    python3 -m tttai.analyze positions.txt > values.txt
+    cat positions.txt | python3 -m tttai.analyze - --workers 4 --chunk 1000
+"""
+
+import argparse
+import collections
+import itertools
+import multiprocessing
+import sys
+
+from tttai import engine
+
+def analyze_line(line):
+    """solve one position line
+
+    Returns:
+        the output line, without newline
+    """
+    from tttai import bitalphabeta  # imported in the worker only
+    fields = line.split()
+    if len(fields) != 2 or len(fields[0]) != 9 or set(fields[0]) - set("XO.") \
+            or fields[1] not in ("X", "O"):
+        return "%s error bad position" % line.strip()
+    text, side = fields
+    player = 1 if side == "X" else -1
+    board = bitalphabeta.Board(engine.parse(text))
+    if board.won() or not board.spaces():
+        # game over, no move; a dead position still lists its moves, all ties
+        return "%s %s %d" % (text, side, bitalphabeta.evaluate(board))
+    children = [((r, c), board.place(r, c, player)) for r, c in engine.COORDS]
+    scores = [(move, bitalphabeta.simple_minimax(child, -player)) for move, child in children if child]
+    value = max(s for _, s in scores) if player == 1 else min(s for _, s in scores)
+    best = " ".join("%d,%d" % move for move, s in scores if s == value)
+    return "%s %s %d %s" % (text, side, value, best)
+
+def analyze_chunk(lines):
+    """solve a chunk of position lines in a worker"""
+    return [analyze_line(line) for line in lines]
+
+def positions(fp):
+    """position lines of a file, without blank lines and comments"""
+    for line in fp:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+def analyze(lines, workers=None, chunksize=1000):
+    """solve position lines in a process pool
+
+    At most 2 chunks per worker are in flight, so arbitrarily long input is
+    streamed with bounded memory.
+
+    Yields:
+        output lines in input order
+    """
+    workers = workers or multiprocessing.cpu_count()
+    lines = iter(lines)
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(itertools.islice(lines, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.apply_async(analyze_chunk, (chunk,)))
+            if not pending:
+                return
+            yield from pending.popleft().get()
+
+def main():
+    "analyze positions from a file or stdin to stdout"
+    parser = argparse.ArgumentParser(description="batch analysis of tic-tac-toe positions")
+    parser.add_argument("input", nargs="?", default="-", help="file of positions, - for stdin")
+    parser.add_argument("--workers", type=int, help="number of processes, default all CPUs")
+    parser.add_argument("--chunk", type=int, default=1000, help="positions per chunk")
+    args = parser.parse_args()
+    fp = sys.stdin if args.input == "-" else open(args.input)
+    with fp:
+        for line in analyze(positions(fp), args.workers, args.chunk):
+            sys.stdout.write(line + "\n")
+
+if __name__ == "__main__":
+    main()
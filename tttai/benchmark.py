@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Benchmark of all tic-tac-toe engines on a fixed position suite and full
+self-play games, with results written as JSON and CSV, and optionally compared
+against a saved baseline to flag regressions
+
+Usage:
+    python3 -m tttai.benchmark 10 --json bench.json --csv bench.csv
+    python3 -m tttai.benchmark 10 --baseline bench.json
+
+where 10 is the random seed. The exit code is 1 if any regression is found.
+"""
+
+import argparse
+import csv
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from tttai import engine
+from tttai.searchstats import SearchStats
+
+# positions as row-major cells and the player to move, O moves first as in play()
+POSITIONS = [
+    (".........", -1),  # empty board
+    ("....O....", 1),   # reply to the centre
+    ("O........", 1),   # reply to a corner
+    ("XX.OO....", 1),   # win at once
+    ("XX..O....", -1),  # must block
+    ("X...O...X", -1),  # avoid the fork
+    ("X.......O", 1),   # set up a fork
+    ("OX..X..O.", -1),  # midgame
+]
+# metrics compared against the baseline, larger is worse
+REGRESSION_METRICS = ["nodes", "seconds", "p99_latency", "peak_memory"]
+
+def percentile(values, q):
+    """nearest-rank percentile, q in 0 to 100"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered)-1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def run_positions(search, seed):
+    """search every position of the suite from a cold state"""
+    results = []
+    for text, player in POSITIONS:
+        random.seed(seed)
+        search.reset()
+        start = time.perf_counter()
+        row, col = search.best_move(engine.parse(text), player)
+        seconds = time.perf_counter() - start
+        results.append({"position": text, "player": player, "move": 3*row + col,
+                        "nodes": search.stats.nodes, "seconds": seconds,
+                        "stats": search.stats.as_dict()})
+    return results
+
+def run_game(search, seed):
+    """play a full game against itself, O moves first, from a cold state"""
+    random.seed(seed)
+    search.reset()
+    board = 0
+    player = -1
+    latencies = []
+    stats = SearchStats()
+    while engine.won(board) is None and engine.spaces(board):
+        start = time.perf_counter()
+        row, col = search.best_move(board, player)
+        latencies.append(time.perf_counter() - start)
+        board |= engine.mask(row, col, player)
+        stats.merge(search.stats)
+        player = -player
+    return {"winner": engine.won(board), "nodes": stats.nodes, "latencies": latencies}
+
+def peak_memory(search, seed):
+    """peak traced memory of the position suite, in bytes. Run separately from
+    the timed runs as tracing slows down everything"""
+    tracemalloc.start()
+    try:
+        run_positions(search, seed)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark(name, seed, games):
+    """all measurements of one engine"""
+    search = engine.load(name)
+    positions = run_positions(search, seed)
+    played = [run_game(search, seed + n) for n in range(games)]
+    latencies = [t for game in played for t in game["latencies"]]
+    nodes = sum(p["nodes"] for p in positions)
+    seconds = sum(p["seconds"] for p in positions)
+    return {
+        "positions": positions,
+        "games": [{"winner": g["winner"], "nodes": g["nodes"]} for g in played],
+        "nodes": nodes,
+        "seconds": seconds,
+        "nodes_per_sec": nodes / seconds if seconds else 0.0,
+        "p50_latency": percentile(latencies, 50),
+        "p99_latency": percentile(latencies, 99),
+        "peak_memory": peak_memory(search, seed),
+    }
+
+def compare(results, baseline, tolerance):
+    """list of regressions: metrics worse than the baseline by more than the
+    tolerance fraction"""
+    regressions = []
+    for name, result in results["engines"].items():
+        base = baseline["engines"].get(name)
+        if not base:
+            continue
+        for metric in REGRESSION_METRICS:
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append("%s: %s %g > baseline %g" % (name, metric, result[metric], base[metric]))
+        moves = [p["move"] for p in result["positions"]]
+        if result["positions"] and [p["position"] for p in result["positions"]] == \
+                [p["position"] for p in base["positions"]] and moves != [p["move"] for p in base["positions"]]:
+            regressions.append("%s: moves changed on the position suite" % name)
+    return regressions
+
+def write_csv(results, path):
+    """one summary row per engine"""
+    columns = ["nodes", "seconds", "nodes_per_sec", "p50_latency", "p99_latency", "peak_memory"]
+    with open(path, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["engine"] + columns)
+        for name, result in results["engines"].items():
+            writer.writerow([name] + [result[col] for col in columns])
+
+def main():
+    "parse arguments, run benchmarks, write and compare results"
+    parser = argparse.ArgumentParser(description="benchmark tic-tac-toe engines")
+    parser.add_argument("seed", type=int, help="random seed")
+    parser.add_argument("--engines", nargs="+", default=list(engine.ENGINES),
+                        choices=engine.ENGINES, help="engines to run")
+    parser.add_argument("--games", type=int, default=2, help="number of full games per engine")
+    parser.add_argument("--json", help="write results as JSON to this file")
+    parser.add_argument("--csv", help="write summary as CSV to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="fraction worse than baseline to flag as regression")
+    args = parser.parse_args()
+    results = {"seed": args.seed, "python": platform.python_version(), "engines": {}}
+    print("%-14s %10s %9s %11s %11s %11s %12s" %
+          ("engine", "nodes", "seconds", "nodes/sec", "p50 move", "p99 move", "peak memory"))
+    for name in args.engines:
+        result = results["engines"][name] = benchmark(name, args.seed, args.games)
+        print("%-14s %10d %9.3f %11.0f %10.4fs %10.4fs %12d" %
+              (name, result["nodes"], result["seconds"], result["nodes_per_sec"],
+               result["p50_latency"], result["p99_latency"], result["peak_memory"]))
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump(results, fp, indent=1)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.baseline:
+        with open(args.baseline) as fp:
+            regressions = compare(results, json.load(fp), args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Opening book of the best move in the first plies
+
+Positions are reduced by the 8 symmetries of the square board: only the
+canonical position, the one of smallest bitboard among its rotations and
+reflections, is stored, with the best move in the canonical orientation. The
+book is a ttfile.DiskCache keyed by (bitboard, player) with the cell index
+3*row+col of the move as value, so it is memory-mapped and costs nothing to
+open. Best moves are from the exact minimax of bitalphabeta.py, and the first
+best cell in row-major order is taken on ties.
+
+Usage:
+    python3 -m tttai.book --plies 4
+"""
+
+import argparse
+import os
+
+from tttai import engine, ttfile
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+EVALUATOR = "book"  # marks the file as a book, not a cache of scores
+
+# the 8 symmetries of the square as functions of (row, col)
+SYMMETRIES = [
+    lambda r, c: (r, c), lambda r, c: (c, 2-r), lambda r, c: (2-r, 2-c), lambda r, c: (2-c, r),
+    lambda r, c: (r, 2-c), lambda r, c: (2-r, c), lambda r, c: (c, r), lambda r, c: (2-c, 2-r),
+]
+# PERMUTATIONS[t][i] is the cell that cell i is moved to by symmetry t
+PERMUTATIONS = [[3*r2 + c2 for r2, c2 in (f(r, c) for r, c in engine.COORDS)] for f in SYMMETRIES]
+
+def transform(bitboard, t):
+    """the bitboard after symmetry t"""
+    result = 0
+    for i, (r, c) in enumerate(engine.COORDS):
+        r2, c2 = divmod(PERMUTATIONS[t][i], 3)
+        for player in engine.PLAYERS:
+            if bitboard & engine.mask(r, c, player):
+                result |= engine.mask(r2, c2, player)
+    return result
+
+def canonical(bitboard):
+    """the canonical bitboard and the symmetry that produces it"""
+    return min((transform(bitboard, t), t) for t in range(len(SYMMETRIES)))
+
+def load(path=PATH):
+    """the book at path, or None if there is no book"""
+    if not os.path.exists(path):
+        return None
+    return ttfile.DiskCache(path, (3, 3, 3), EVALUATOR)
+
+def lookup(book, board, player):
+    """the book move of player
+
+    Args:
+        book: DiskCache from load()
+        board: bitboard, or Board of any engine
+        player: +1 or -1, or "X" or "O" of the 2D array engines
+    Returns:
+        (row, col), or None if the position is not in the book
+    """
+    board = getattr(board, "board", board)
+    if not isinstance(board, int):  # 2D array of minimax.py and alphabeta.py
+        board = engine.parse("".join(cell if cell in "XO" else "." for row in board for cell in row))
+    if player in ("X", "O"):
+        player = 1 if player == "X" else -1
+    key, t = canonical(board)
+    cell = book.get((key, player))
+    if cell is None:
+        return None
+    return engine.COORDS[PERMUTATIONS[t].index(cell)]
+
+def generate(plies, path=PATH):
+    """write the book of all positions with fewer than plies stones, for
+    either player moving first"""
+    from tttai import bitalphabeta  # only needed to build the book
+    if os.path.exists(path):
+        os.remove(path)
+    book = ttfile.DiskCache(path, (3, 3, 3), EVALUATOR)
+    level = {(0, 1), (0, -1)}
+    for _ in range(plies):
+        nextlevel = set()
+        for bitboard, player in level:
+            board = bitalphabeta.Board(bitboard)
+            children = [(3*r + c, board.place(r, c, player)) for r, c in engine.COORDS]
+            scores = [(cell, bitalphabeta.simple_minimax(child, -player)) for cell, child in children if child]
+            best = max(scores, key=lambda pair: player * pair[1])[0]  # first best cell
+            book[(bitboard, player)] = best
+            for _, child in children:
+                if child and not engine.won(child.board) and engine.spaces(child.board):
+                    nextlevel.add((canonical(child.board)[0], -player))
+        level = nextlevel
+    book.save()
+    return book
+
+def main():
+    "build the book"
+    parser = argparse.ArgumentParser(description="build the opening book")
+    parser.add_argument("--plies", type=int, default=4, help="number of plies in the book")
+    parser.add_argument("--output", default=PATH, help="book file")
+    args = parser.parse_args()
+    book = generate(args.plies, args.output)
+    print("%d positions in %s" % (book.count, args.output))
+
+if __name__ == "__main__":
+    main()
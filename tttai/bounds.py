@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Bounds on the score of a position, to narrow the alpha-beta window
+
+A player with no line left free of the opponent's stones cannot win, so the
+score is at most a tie if X cannot win and at least a tie if O cannot. With
+distance_evaluate, a win is worth 10 plus the empty spots left, so the side to
+move cannot win by more than a win on this move, nor lose by more than a loss
+on the next.
+"""
+
+WIN = 10  # score of a win of X before the bonus of distance_evaluate
+
+def window(board, maximizer, alpha, beta, tie=True, mate_distance=False):
+    """narrow the window of a search of board
+
+    Args:
+        board: the position, with spaces() and, if tie is set, winnable()
+        maximizer: whether the player to move is X
+        tie: bound by a tie if one side cannot win any more
+        mate_distance: bound by the fastest win of distance_evaluate
+    Returns:
+        alpha, beta, and the score to return without a search if the bounds
+        fall outside the window, or None
+    """
+    if tie:
+        xcan, ocan = board.winnable()
+        if not xcan:
+            beta = min(beta, 0)
+        if not ocan:
+            alpha = max(alpha, 0)
+        if alpha >= beta:
+            return alpha, beta, 0  # the tie bound is outside the window
+    if mate_distance:
+        # no win is faster than on this move, none of the opponent faster than on the next
+        fastest = WIN + board.spaces() - 1
+        lower, upper = (-(fastest-1), fastest) if maximizer else (-fastest, fastest-1)
+        if upper <= alpha:
+            return alpha, beta, upper  # cannot reach alpha
+        if lower >= beta:
+            return alpha, beta, lower  # cannot stay below beta
+        alpha, beta = max(alpha, lower), min(beta, upper)
+    return alpha, beta, None
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Test client of the analysis server
+
+Sends best_move requests of random positions concurrently on one connection,
+then prints the throughput seen by the client and the stats of the server.
+
+Usage:
+    python3 -m tttai.client --port 8765 --engine negascout --requests 200 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from tttai import benchmark, engine
+
+def random_position(rng):
+    """random position that is not finished, and the player to move, O first"""
+    while True:
+        bitboard = 0
+        player = -1
+        for cell in rng.sample(range(9), rng.randrange(8)):
+            bitboard |= engine.mask(cell // 3, cell % 3, player)
+            player = -player
+        if not engine.won(bitboard):
+            return engine.cells(bitboard), engine.symbol(player)
+
+class Client:
+    """a connection to the server with many requests in flight"""
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.waiting = {}  # request id -> future of the reply
+        self.counter = 0
+        self.receiver = asyncio.ensure_future(self.receive())
+    async def receive(self):
+        """route each reply line to the request of its id"""
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            self.waiting.pop(reply["id"]).set_result(reply)
+    async def request(self, **request):
+        """send a request and wait for its reply"""
+        self.counter += 1
+        request["id"] = self.counter
+        future = self.waiting[self.counter] = asyncio.get_running_loop().create_future()
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+    async def close(self):
+        self.writer.close()
+        self.receiver.cancel()
+
+async def run(args):
+    "send the requests and print the results"
+    if args.unix:
+        client = Client(*await asyncio.open_unix_connection(args.unix))
+    else:
+        client = Client(*await asyncio.open_connection(args.host, args.port))
+    rng = random.Random(args.seed)
+    positions = [random_position(rng) for _ in range(args.requests)]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    async def one(text, side):
+        async with semaphore:
+            start = time.perf_counter()
+            reply = await client.request(op="best_move", engine=args.engine, position=text,
+                                         player=side, budget=args.budget, timeout=args.timeout)
+            latencies.append(time.perf_counter() - start)
+            return reply
+    start = time.perf_counter()
+    replies = await asyncio.gather(*[one(text, side) for text, side in positions])
+    elapsed = time.perf_counter() - start
+    errors = [reply for reply in replies if "error" in reply]
+    print("%d requests in %.3fs, %.1f per second, %d errors" %
+          (len(replies), elapsed, len(replies) / elapsed, len(errors)))
+    if latencies:
+        print("latency p50 %.4fs p99 %.4fs" %
+              (benchmark.percentile(latencies, 50), benchmark.percentile(latencies, 99)))
+    print(json.dumps(await client.request(op="stats"), indent=1))
+    await client.close()
+
+def main():
+    "parse arguments and run the client"
+    parser = argparse.ArgumentParser(description="test client of the tic-tac-toe analysis server")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address of the server")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port of the server")
+    parser.add_argument("--unix", help="Unix socket of the server instead of TCP")
+    parser.add_argument("--engine", default="negascout", choices=engine.ENGINES, help="engine to query")
+    parser.add_argument("--requests", type=int, default=100, help="number of requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight")
+    parser.add_argument("--budget", type=int, help="playouts per move of monte carlo engines")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds per request")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of positions")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Common interface of the tic-tac-toe engines
+
+Positions are passed around as the 18-bit bitboard int of bitalphabeta.py
+(higher 9 bits for X, lower 9 bits for O, cell (0,0) the MSB) and players as
++1 for X and -1 for O. Each engine module is wrapped by an Engine subclass and
+imported only when the engine is loaded by name, so that running one engine
+does not import the others, nor gmpy or value tables it does not use.
+"""
+
+import importlib
+import random
+
+from tttai.searchstats import SearchStats
+
+PLAYERS = [1, -1]  # maximizer == 1
+COORDS = [(r, c) for r in range(3) for c in range(3)]
+LINES = (0b000000111, 0b000111000, 0b111000000, # rows
+         0b001001001, 0b010010010, 0b100100100, # cols
+         0b100010001, 0b001010100               # diags
+        )
+
+def symbol(code):
+    """Return the symbol of player"""
+    assert code in PLAYERS
+    return "X" if code == 1 else "O"
+
+def mask(row, col, player):
+    """bitmask of player on row and col, same as Board.mask() of bitboard engines"""
+    offset = 3*(2-row) + (2-col)
+    if player == 1:
+        offset += 9
+    return 1 << offset
+
+def parse(text):
+    """bitboard of row-major cells of X, O and ., e.g. "X...O...."."""
+    bitboard = 0
+    for (r, c), cell in zip(COORDS, text):
+        if cell in "XO":
+            bitboard |= mask(r, c, 1 if cell == "X" else -1)
+    return bitboard
+
+def cells(bitboard):
+    """row-major cells of X, O and ., the inverse of parse()"""
+    return "".join("X" if bitboard & mask(r, c, 1) else "O" if bitboard & mask(r, c, -1) else "."
+                   for r, c in COORDS)
+
+def show(bitboard):
+    """board diagram in the same format as Board.__repr__()"""
+    rows = [" | ".join(cells(bitboard)[n:n+3].replace(".", " ")) for n in range(0, 9, 3)]
+    return " " + "\n---+---+---\n ".join(rows)
+
+def won(bitboard):
+    """check winner. Return the winner (+1 or -1) or None"""
+    shifted = bitboard >> 9
+    for line in LINES:
+        if bitboard & line == line:
+            return -1
+        if shifted & line == line:
+            return 1
+
+def spaces(bitboard):
+    """tell how many empty spots on the board"""
+    return 9 - bin(bitboard).count("1")
+
+def move_of(bitboard, child):
+    """the (row, col) placed to turn bitboard into child"""
+    offset = (bitboard ^ child).bit_length() - 1
+    offset %= 9
+    return 2 - offset // 3, 2 - offset % 3
+
+class Engine:
+    """An engine module behind the common interface
+
+    Subclasses implement best_move(). The SearchStats of the last search is kept
+    in the attribute stats.
+    """
+    def __init__(self, module):
+        self.module = module
+        self.stats = SearchStats()
+    def reset(self):
+        """forget the search state kept in module globals between moves"""
+        for name in ("CACHE", "GRAPH", "KILLERS", "TREE"):
+            if hasattr(self.module, name):
+                getattr(self.module, name).clear()
+    def code(self, player):
+        """the engine's representation of player +1 or -1"""
+        return self.module.PLAYERS[0 if player == 1 else 1]
+    def board(self, bitboard):
+        """the engine's Board of a bitboard"""
+        if self.module.PLAYERS[0] == 1:
+            return self.module.Board(bitboard)
+        board = self.module.Board()
+        for r, c in COORDS:
+            for player in PLAYERS:
+                if bitboard & mask(r, c, player):
+                    board = board.place(r, c, self.code(player))
+        return board
+    def best_move(self, bitboard, player, budget=None):
+        """find the move of player on the board
+
+        Args:
+            bitboard: the position
+            player: +1 or -1 for the player to move
+            budget: number of playouts for monte carlo engines, None for the
+                engine default. Exact searches ignore it.
+        Returns:
+            (row, col) of the move
+        """
+        raise NotImplementedError
+
+class MinimaxEngine(Engine):
+    """engines of a minimax function returning the exact score"""
+    def best_move(self, bitboard, player, budget=None):
+        board = self.board(bitboard)
+        me, opponent = self.code(player), self.code(-player)
+        self.stats = SearchStats()
+        candidates = [((r, c), child) for r, c in COORDS for child in [board.place(r, c, me)] if child]
+        candidates = [(move, self.module.minimax(child, opponent, stats=self.stats, ply=1))
+                      for move, child in candidates]
+        random.shuffle(candidates)
+        # optimizing the worse case score
+        if player == 1:
+            return max(candidates, key=lambda pair: pair[1])[0]
+        return min(candidates, key=lambda pair: pair[1])[0]
+
+class MCTSEngine(Engine):
+    """flat monte carlo of mcts.py, budget is shared by all candidate moves
+
+    Args:
+        table: path of a tdlearn value table to replace the end of playouts
+    """
+    def __init__(self, module, table=None):
+        super().__init__(module)
+        if table:
+            from tttai import tdlearn
+            module.value_table = tdlearn.load(table)
+    def best_move(self, bitboard, player, budget=None):
+        board = self.board(bitboard)
+        candidates = [((r, c), child) for r, c in COORDS for child in [board.place(r, c, player)] if child]
+        n = max(1, budget // len(candidates)) if budget else self.module.N
+        candidates = [(move, self.module.mcts(child, -player, n)) for move, child in candidates]
+        random.shuffle(candidates)
+        self.stats = SearchStats()
+        self.stats.plies = [n * len(candidates)]
+        # min opponent's score
+        return min(candidates, key=lambda pair: pair[1])[0]
+
+class GraphEngine(MCTSEngine):
+    """monte carlo tree search of mctsgraph.py
+
+    Args:
+        table: path of a tdlearn value table to replace the end of playouts
+        rave: name of the RAVE beta schedule, "equivalence" or "mse"
+    """
+    def __init__(self, module, table=None, rave=None):
+        super().__init__(module, table)
+        if rave:
+            module.rave_beta = getattr(module, rave + "_beta")
+    def best_move(self, bitboard, player, budget=None):
+        root = self.module.lookup(self.board(bitboard), player)
+        visits = root.visits
+        child, _ = self.module.mctsgraph(self.board(bitboard), player, budget or self.module.N)
+        self.stats = SearchStats()
+        self.stats.plies = [root.visits - visits]
+        return move_of(bitboard, child.board)
+
+class TreeEngine(MCTSEngine):
+    """UCT tree search of mcts.py in its node pool, the subtree of the
+    position is kept from the previous move
+
+    Args:
+        table: path of a tdlearn value table to replace the end of playouts
+    """
+    def best_move(self, bitboard, player, budget=None):
+        n = budget or self.module.N
+        child, _, _ = self.module.uct(self.board(bitboard), player, n)
+        self.stats = SearchStats()
+        self.stats.plies = [n]
+        return move_of(bitboard, child.board)
+
+# engine name: (module, Engine subclass), modules are imported on load()
+ENGINES = {
+    "minimax": ("tttai.minimax", MinimaxEngine),
+    "alphabeta": ("tttai.alphabeta", MinimaxEngine),
+    "bitalphabeta": ("tttai.bitalphabeta", MinimaxEngine),
+    "killer": ("tttai.killer", MinimaxEngine),
+    "negascout": ("tttai.negascout", MinimaxEngine),
+    "mcts": ("tttai.mcts", MCTSEngine),
+    "mctsgraph": ("tttai.mctsgraph", GraphEngine),
+    "mctstree": ("tttai.mcts", TreeEngine),
+    "pns": ("tttai.pns", MinimaxEngine),
+}
+
+def load(name, **options):
+    """import the module of an engine and create its Engine
+
+    Args:
+        name: key of ENGINES
+        options: keyword arguments to the Engine subclass, e.g. table
+    """
+    modulename, cls = ENGINES[name]
+    return cls(importlib.import_module(modulename), **options)
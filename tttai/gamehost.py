@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Host of many concurrent human-vs-engine games
+
+Each game is a small object of the bitboard, the player to move and the side
+of the engine, so thousands of games fit in memory. Engine moves of all games
+are queued and sent to worker processes in batches: a batch is sent when it is
+full or when its oldest request has waited BATCH_WAIT seconds. Within a batch,
+games at the same position (common in the opening) are searched only once.
+
+Run as a script, it simulates many players making random moves after a random
+think time, and reports the percentiles of engine move latency under that load.
+
+Usage:
+    python3 -m tttai.gamehost --games 2000 --engine negascout --workers 4
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import random
+import time
+
+from tttai import benchmark, engine
+
+BATCH_SIZE = 256  # most positions in one worker call
+BATCH_WAIT = 0.005  # seconds to wait to fill a batch
+
+LOADED = {}  # engines loaded in this worker process, by name
+
+def solve_batch(name, jobs):
+    """search a batch of (bitboard, player, budget) in a worker process
+
+    Returns:
+        list of (row, col) moves in the same order
+    """
+    if name not in LOADED:
+        LOADED[name] = engine.load(name)
+    search = LOADED[name]
+    return [search.best_move(bitboard, player, budget) for bitboard, player, budget in jobs]
+
+class Game:
+    """state of one game: bitboard, player to move (+1 or -1), the engine's side"""
+    __slots__ = ("board", "player", "ai")
+    def __init__(self, ai, player=-1):
+        self.board = 0
+        self.player = player
+        self.ai = ai
+    def finished(self):
+        return bool(engine.won(self.board)) or not engine.spaces(self.board)
+    def place(self, row, col):
+        """play a move of the player to move, raise ValueError if illegal"""
+        if self.finished() or not 0 <= row < 3 or not 0 <= col < 3:
+            raise ValueError("illegal move")
+        if self.board & (engine.mask(row, col, 1) | engine.mask(row, col, -1)):
+            raise ValueError("cell occupied")
+        self.board |= engine.mask(row, col, self.player)
+        self.player = -self.player
+
+class Host:
+    """games in memory and the batching of engine moves
+
+    Args:
+        name: the engine
+        workers: number of worker processes
+        budget: playouts per move of monte carlo engines
+    """
+    def __init__(self, name, workers=None, budget=None):
+        self.name = name
+        self.budget = budget
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers)
+        self.games = {}
+        self.counter = 0
+        self.queue = asyncio.Queue()
+        self.latencies = []  # seconds from engine move request to answer
+        self.batches = self.searched = 0
+        self.batcher = asyncio.ensure_future(self.batch_loop())
+    def new_game(self, ai=1):
+        """create a game with the engine playing ai (+1 for X, -1 for O)"""
+        self.counter += 1
+        self.games[self.counter] = Game(ai)
+        return self.counter
+    def end_game(self, gameid):
+        del self.games[gameid]
+    async def move(self, gameid, row, col):
+        """play the human's move, then the engine's reply if the game goes on
+
+        Returns:
+            (row, col) of the engine's move, or None if the game is finished
+        """
+        game = self.games[gameid]
+        if game.player == game.ai:
+            raise ValueError("not your turn")
+        game.place(row, col)
+        if game.finished():
+            return None
+        return await self.engine_move(gameid)
+    async def engine_move(self, gameid):
+        """queue the game for an engine move and play it"""
+        game = self.games[gameid]
+        future = asyncio.get_running_loop().create_future()
+        start = time.perf_counter()
+        await self.queue.put((game.board, game.player, future))
+        row, col = await future
+        self.latencies.append(time.perf_counter() - start)
+        game.place(row, col)
+        return row, col
+    async def batch_loop(self):
+        """collect queued requests into batches and dispatch them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + BATCH_WAIT
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            asyncio.ensure_future(self.dispatch(batch))
+    async def dispatch(self, batch):
+        """search the distinct positions of a batch in one worker call"""
+        waiting = {}  # (bitboard, player) -> futures
+        for bitboard, player, future in batch:
+            waiting.setdefault((bitboard, player), []).append(future)
+        jobs = [(bitboard, player, self.budget) for bitboard, player in waiting]
+        self.batches += 1
+        self.searched += len(jobs)
+        loop = asyncio.get_running_loop()
+        try:
+            moves = await loop.run_in_executor(self.pool, solve_batch, self.name, jobs)
+        except Exception as error:  # pass the failure to every waiting game
+            for futures in waiting.values():
+                for future in futures:
+                    future.set_exception(error)
+            return
+        for futures, move in zip(waiting.values(), moves):
+            for future in futures:
+                future.set_result(move)
+    def close(self):
+        self.batcher.cancel()
+        self.pool.shutdown()
+
+async def simulate_player(host, rng, think):
+    """a player making random moves after a random think time"""
+    gameid = host.new_game(ai=rng.choice(engine.PLAYERS))
+    game = host.games[gameid]
+    if game.player == game.ai:
+        await host.engine_move(gameid)
+    while not game.finished():
+        await asyncio.sleep(rng.uniform(0, think))
+        free = [(r, c) for r, c in engine.COORDS
+                if not game.board & (engine.mask(r, c, 1) | engine.mask(r, c, -1))]
+        await host.move(gameid, *rng.choice(free))
+    winner = engine.won(game.board)
+    host.end_game(gameid)
+    return 0 if not winner else 1 if winner == game.ai else -1
+
+async def simulate(args):
+    "run many simulated games at once and print engine move latency"
+    host = Host(args.engine, args.workers, args.budget)
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    results = await asyncio.gather(*[simulate_player(host, random.Random(rng.random()), args.think)
+                                     for _ in range(args.games)])
+    elapsed = time.perf_counter() - start
+    host.close()
+    latencies = host.latencies
+    print("%d games, %d engine moves in %.2fs, %.0f moves per second" %
+          (args.games, len(latencies), elapsed, len(latencies) / elapsed))
+    print("engine won %d, tied %d, lost %d" % (results.count(1), results.count(0), results.count(-1)))
+    if not latencies:
+        return  # no engine move, no batch
+    print("%d batches, %.1f requests and %.1f distinct positions per batch" %
+          (host.batches, len(latencies) / host.batches, host.searched / host.batches))
+    print("move latency p50 %.4fs p90 %.4fs p99 %.4fs max %.4fs" %
+          (benchmark.percentile(latencies, 50), benchmark.percentile(latencies, 90),
+           benchmark.percentile(latencies, 99), max(latencies)))
+
+def main():
+    "parse arguments and run the simulation"
+    parser = argparse.ArgumentParser(description="many concurrent games against an engine")
+    parser.add_argument("--games", type=int, default=1000, help="number of concurrent games")
+    parser.add_argument("--engine", default="negascout", choices=engine.ENGINES, help="engine to play")
+    parser.add_argument("--workers", type=int, help="number of processes, default all CPUs")
+    parser.add_argument("--budget", type=int, help="playouts per move of monte carlo engines")
+    parser.add_argument("--think", type=float, default=0.5, help="most seconds a player thinks")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    asyncio.run(simulate(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compact binary file of game records
+
+The file is a header of the board geometry followed by fixed-size game
+records. A record has the number of moves, the first player, the winner (+1,
+-1, or 0 for tie), the seconds the game took as float32, and one byte per move
+for the cell r*cols+c, padded with 255 up to one byte per cell. So a 3x3 game
+takes 16 bytes, where a JSON line of tournament.py takes about 370.
+
+Records of fixed size make the file an array: the reader maps it and reads the
+n-th game without parsing the ones before, and decode() turns the whole file
+into a NumPy structured array in one call, without any per-game Python code.
+
+Usage:
+    python3 -m tttai.gamerecord convert games.jsonl games.bin
+    python3 -m tttai.gamerecord stats games.bin
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"TTTG"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBB")  # magic, version, rows, cols, k
+GAME = struct.Struct("<Bbbf")  # number of moves, first player, winner, seconds
+PAD = 255  # move byte after the last move
+BUFFER_SIZE = 1 << 16  # bytes buffered by the writer before a write
+
+def record_size(geometry):
+    """bytes of a game record of a geometry"""
+    rows, cols, _ = geometry
+    if rows * cols >= PAD:
+        raise ValueError("board of %dx%d too large for one byte a move" % (rows, cols))
+    return GAME.size + rows * cols
+
+class RecordWriter:
+    """append games to a record file, creating it if it does not exist
+
+    Records are collected in a buffer and written BUFFER_SIZE bytes at a time,
+    so writing a game costs no system call. The buffer is written at close().
+
+    Args:
+        path: the record file
+        geometry: tuple of rows, cols, and k in a row
+    """
+    def __init__(self, path, geometry=(3, 3, 3)):
+        self.geometry = tuple(geometry)
+        self.size = record_size(geometry)
+        self.buffer = bytearray()
+        header = HEADER.pack(MAGIC, VERSION, *self.geometry)
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            with open(path, "rb") as fp:
+                if fp.read(HEADER.size) != header:
+                    raise ValueError("%s is a record file of other version or geometry" % path)
+            self.fp = open(path, "r+b")
+            # drop a partly written last record
+            self.fp.truncate(HEADER.size + (os.path.getsize(path) - HEADER.size) // self.size * self.size)
+            self.fp.seek(0, os.SEEK_END)
+        else:
+            self.fp = open(path, "wb")
+            self.fp.write(header)
+    def write(self, moves, winner, seconds=0.0, first=-1):
+        """add a game
+
+        Args:
+            moves: list of (row, col) in the order played
+            winner: +1, -1, or 0 for tie
+            seconds: time the game took
+            first: player of the first move, O (-1) by default
+        """
+        cols = self.geometry[1]
+        self.buffer += GAME.pack(len(moves), first, winner, seconds)
+        self.buffer += bytes(r*cols + c for r, c in moves)
+        self.buffer += bytes([PAD] * (self.size - GAME.size - len(moves)))
+        if len(self.buffer) >= BUFFER_SIZE:
+            self.flush()
+    def flush(self):
+        """write the buffered records to the file"""
+        self.fp.write(self.buffer)
+        self.fp.flush()
+        self.buffer.clear()
+    def close(self):
+        self.flush()
+        self.fp.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+
+class RecordReader:
+    """memory-mapped record file, a sequence of games
+
+    Args:
+        path: the record file
+    """
+    def __init__(self, path):
+        self.fp = open(path, "rb")
+        self.mm = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, cols, k = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a record file of version %d" % (path, VERSION))
+        self.geometry = (rows, cols, k)
+        self.size = record_size(self.geometry)
+        self.count = (len(self.mm) - HEADER.size) // self.size  # a partial last record is ignored
+    def __len__(self):
+        return self.count
+    def __getitem__(self, n):
+        """the n-th game as a dict of moves, first, winner and seconds"""
+        if not 0 <= n < self.count:
+            raise IndexError(n)
+        offset = HEADER.size + n * self.size
+        length, first, winner, seconds = GAME.unpack_from(self.mm, offset)
+        cells = self.mm[offset + GAME.size:offset + GAME.size + length]
+        cols = self.geometry[1]
+        return {"moves": [divmod(cell, cols) for cell in cells], "first": first,
+                "winner": winner, "seconds": seconds}
+    def __iter__(self):
+        for n in range(self.count):
+            yield self[n]
+    def decode(self):
+        """all games as a NumPy structured array of fields length, first,
+        winner, seconds and moves, the cells as uint8 padded with 255. The
+        array is a view of the mapped file, it is not copied"""
+        import numpy  # only needed to decode
+        rows, cols, _ = self.geometry
+        dtype = numpy.dtype([("length", "u1"), ("first", "i1"), ("winner", "i1"),
+                             ("seconds", "<f4"), ("moves", "u1", (rows * cols,))])
+        return numpy.frombuffer(self.mm, dtype=dtype, count=self.count, offset=HEADER.size)
+    def close(self):
+        self.mm.close()
+        self.fp.close()
+
+def convert(source, target):
+    """append the games of a JSONL file of tournament.py to a record file
+
+    Returns:
+        the number of games converted
+    """
+    count = 0
+    with open(source) as fp, RecordWriter(target) as writer:
+        for line in fp:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            writer.write(record["moves"], record["winner"], sum(record["times"]))
+            count += 1
+    return count
+
+def stats(path):
+    """print the outcomes and lengths of the games in a record file"""
+    reader = RecordReader(path)
+    start = time.perf_counter()
+    try:
+        games = reader.decode()
+        wins = {w: int((games["winner"] == w).sum()) for w in (1, 0, -1)}
+        lengths = games["length"].mean() if len(games) else 0.0
+        seconds = float(games["seconds"].sum())
+        del games  # the array is a view of the mapped file, drop it before close()
+    except ImportError:  # no numpy: iterate the games instead
+        wins = {1: 0, 0: 0, -1: 0}
+        lengths = seconds = 0.0
+        for game in reader:
+            wins[game["winner"]] += 1
+            lengths += len(game["moves"]) / len(reader)
+            seconds += game["seconds"]
+    elapsed = time.perf_counter() - start
+    print("%d games of %dx%d k=%d in %d bytes, read in %.4fs" %
+          ((len(reader),) + reader.geometry + (os.path.getsize(path), elapsed)))
+    print("X won %d, tied %d, O won %d, %.2f moves a game, %.3fs a game" %
+          (wins[1], wins[0], wins[-1], lengths, seconds / len(reader) if len(reader) else 0.0))
+    reader.close()
+
+def main():
+    "parse arguments and run the command"
+    parser = argparse.ArgumentParser(description="binary game record files")
+    commands = parser.add_subparsers(dest="command")
+    parser_convert = commands.add_parser("convert", help="convert tournament JSONL into records")
+    parser_convert.add_argument("source", help="JSONL file of tournament.py")
+    parser_convert.add_argument("target", help="record file, appended if exists")
+    parser_stats = commands.add_parser("stats", help="print outcomes of the games in a record file")
+    parser_stats.add_argument("path", help="record file")
+    args = parser.parse_args()
+    if args.command == "convert":
+        print("%d games converted" % convert(args.source, args.target))
+    elif args.command == "stats":
+        stats(args.path)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
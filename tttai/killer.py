@@ -12,9 +12,12 @@ import collections
 
 import gmpy
 
+from tttai import book, bounds, mnk
+from tttai.searchstats import SearchStats
+
 PLAYERS = [1, -1]  # maximizer == 1
 COORDS = [(r, c) for r in range(3) for c in range(3)]
-COUNT = 0
+NEAR = 0  # generate moves within this distance of a stone, 0 for all cells
 
 def symbol(code):
     """Return the symbol of player"""
@@ -26,8 +29,9 @@ def grouper(iterable, n, fillvalue=None):
     args = [iter(iterable)] * n
     return itertools.zip_longest(*args, fillvalue=fillvalue)
 
-class Board:
-    """bit-vector based tic-tac-toe board"""
+class Board(mnk.Board):
+    """bit-vector based tic-tac-toe board, the 3,3,3 board of mnk.py with its
+    winnable(), threats(), candidates() and moves()"""
     def __init__(self, board=0):
         self.board = board
     def mask(self, row, col, player):
@@ -96,6 +100,10 @@ class Board:
                 return -1
             if shifted & mask == mask:
                 return 1
+    @property
+    def near(self):
+        """bitmask of the cells within NEAR of a stone, for candidates()"""
+        return mnk.nearby(self.board, 3, 3, NEAR)
 
 def simple_evaluate(board):
     """simple evaluator: +10, -10 for someone won, 0 for tie. None otherwise"""
@@ -104,7 +112,7 @@ def simple_evaluate(board):
         return 10
     elif winner == -1:
         return -10
-    if not board.spaces():
+    if not board.spaces() or board.winnable() == (False, False):
         return 0
 
 def heuristic_evaluate(board):
@@ -126,24 +134,38 @@ def heuristic_evaluate(board):
             score += int(10**(countx-1))
     return score
 
-evaluate = simple_evaluate
+def distance_evaluate(board):
+    """evaluator preferring faster wins: +10, -10 for someone won, plus one for
+    each empty spot left, 0 for tie. None otherwise"""
+    value = simple_evaluate(board)
+    if value:
+        value += board.spaces() if value > 0 else -board.spaces()
+    return value
+
+evaluate = distance_evaluate
+MATE_DISTANCE = True  # prune lines that cannot end in a faster win than found
 
 CACHE = {}
 
-def simple_minimax(board, player):
+def simple_minimax(board, player, stats=None, ply=0):
     """player to move one step on the board, find the minimax (best of the worse case) score"""
+    if stats is None:
+        stats = SearchStats()
     # check cache for quick return
+    stats.probes += 1
     if (board.board, player) in CACHE:
+        stats.hits += 1
         return CACHE[(board.board, player)]
-    global COUNT
-    COUNT += 1
+    stats.visit(ply)
     assert player in PLAYERS
     opponent = -player
     value = evaluate(board)
     if value is not None:
+        stats.terminals += 1
         return value  # exact score of the board
+    stats.expanded += 1
     # possible opponent moves: The worse case scores in different options
-    candscores = [simple_minimax(b, opponent) for b in [board.place(r, c, player) for r, c in COORDS] if b]
+    candscores = [simple_minimax(b, opponent, stats, ply+1) for b in [board.place(r, c, player) for r, c in board.moves(player)] if b]
     # evaluate the best of worse case scores
     if player == 1:
         value = max(candscores)
@@ -155,23 +177,31 @@ def simple_minimax(board, player):
 
 KILLERS = collections.deque()
 
-def alphabeta(board, player, alpha=-float("inf"), beta=float("inf")):
+def alphabeta(board, player, alpha=-float("inf"), beta=float("inf"), stats=None, ply=0):
     """minimax with alpha-beta pruning. It implies that we expect the score
     should between lowerbound alpha and upperbound beta to be useful
     """
+    if stats is None:
+        stats = SearchStats()
     if "Use cache" == False:
         # make alpha-beta with memory: interferes with killer heuristics
+        stats.probes += 1
         if (board.board, player) in CACHE:
+            stats.hits += 1
             return CACHE[(board.board, player)]
-    global COUNT
-    COUNT += 1
+    stats.visit(ply)
     assert player in PLAYERS
     opponent = -player
     value = evaluate(board)
     if value is not None:
+        stats.terminals += 1
         return value  # exact score of the board (terminal nodes)
+    alpha, beta, value = bounds.window(board, player == 1, alpha, beta, mate_distance=MATE_DISTANCE)
+    if value is not None:
+        return value  # the score is bounded outside the window
+    stats.expanded += 1
     # minimax search with alpha-beta pruning
-    masks = filter(None, [board.check(r, c, player) for r, c in COORDS])
+    masks = filter(None, [board.check(r, c, player) for r, c in board.moves(player)])
     children = [(mask, board.place(mask)) for mask in masks]
     if "Heuristic improvement" == False:
         # sort by a heuristic function to hint for earlier cut-off
@@ -182,20 +212,22 @@ def alphabeta(board, player, alpha=-float("inf"), beta=float("inf")):
         children = sorted(children, key=lambda x: x[0] not in KILLERS)
     if player == 1:   # player is maximizer
         value = -float("inf")
-        for mask, child in children:
-            value = max(value, alphabeta(child, opponent, alpha, beta))
+        for n, (mask, child) in enumerate(children):
+            value = max(value, alphabeta(child, opponent, alpha, beta, stats, ply+1))
             alpha = max(alpha, value)
             if alpha >= beta:
+                stats.cutoff("beta", n)
                 KILLERS.append(mask)
                 if len(KILLERS) > 4:
                     KILLERS.popleft()
                 break   # beta cut-off
     else:               # player is minimizer
         value = float("inf")
-        for _, child in children:
-            value = min(value, alphabeta(child, opponent, alpha, beta))
+        for n, (_, child) in enumerate(children):
+            value = min(value, alphabeta(child, opponent, alpha, beta, stats, ply+1))
             beta = min(beta, value)
             if alpha >= beta:
+                stats.cutoff("alpha", n)
                 break   # alpha cut-off
     # save into cache
     if "Use cache" == False:
@@ -206,15 +238,22 @@ minimax = alphabeta
 
 def play():
     "auto play tic-tac-toe"
-    global COUNT
+    opening = book.load()
     minimizer = True
     game = Board()
     # loop until the game is done
     while not game.won():
         player = PLAYERS[minimizer]
         opponent = PLAYERS[not minimizer]
-        COUNT = 0
-        candidates = [(b, minimax(b, opponent)) for b in [game.place(r, c, player) for r, c in COORDS] if b]
+        move = book.lookup(opening, game, player) if opening else None
+        if move:
+            game = game.place(move[0], move[1], player)
+            minimizer = not minimizer
+            print("\n%s move from book:" % symbol(player))
+            print(game)
+            continue
+        stats = SearchStats()
+        candidates = [(b, minimax(b, opponent, stats=stats, ply=1)) for b in [game.place(r, c, player) for r, c in COORDS] if b]
         if not candidates:
             break
         random.shuffle(candidates)
@@ -225,7 +264,7 @@ def play():
             game = min(candidates, key=lambda pair: pair[1])[0]
         # print board and switch
         minimizer = not minimizer
-        print("\n%s move after %d search steps:" % (symbol(player), COUNT))
+        print("\n%s move after %d search steps:" % (symbol(player), stats.nodes))
         print(game)
     # show result
     winner = game.won()
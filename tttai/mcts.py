@@ -0,0 +1,357 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tic-tac-toe using monte carlo tree search
+
+mcts() is flat monte carlo: random playouts from a position. uct() is UCT
+tree search, with the tree in a NodePool of parallel arrays rather than one
+Python object per node: a node is an index into arrays of its visits, wins,
+first child, number of children, move and parent, and the children of a node
+are a block of consecutive indices. The arrays grow by CHUNK nodes when full,
+so a million nodes take some 25 MB and nothing for the garbage collector to
+track. When the game moves on, the subtree of the new position is kept and
+compacted to the front of new arrays, the rest of the tree is dropped.
+"""
+
+import math
+import random
+import sys
+import itertools
+import time
+from array import array
+
+import gmpy
+
+from tttai import book, mnk, tdlearn
+
+PLAYERS = [1, -1]  # maximizer == 1
+COORDS = [(r, c) for r in range(3) for c in range(3)]
+NEAR = 0  # generate moves within this distance of a stone, 0 for all cells
+
+def symbol(code):
+    """Return the symbol of player"""
+    assert code in PLAYERS
+    return "X" if code == 1 else "O"
+
+def grouper(iterable, n, fillvalue=None):
+    # function copied from Python doc, itertools module
+    args = [iter(iterable)] * n
+    return itertools.zip_longest(*args, fillvalue=fillvalue)
+
+class Board(mnk.Board):
+    """bit-vector based tic-tac-toe board, the 3,3,3 board of mnk.py with its
+    winnable(), threats(), candidates() and moves()"""
+    def __init__(self, board=0):
+        self.board = board
+    def mask(self, row, col, player):
+        """Produce the bitmask for row and col
+        The 18-bit vector is row-major, with matrix cell (0,0) the MSB. And the
+        higher 9-bit is for 1 (X) and lower 9-bit is for -1 (O)
+
+        Args:
+            row, col: integers from 0 to 2 inclusive
+        """
+        offset = 3*(2-row) + (2-col)
+        if player == 1:
+            offset += 9
+        return 1 << offset
+    def place(self, row, col, player):
+        """produce a new board with row and col set to a symbol. Return None if
+        some symbol already set.
+
+        Args:
+            what: either +1 or -1
+        """
+        assert player in PLAYERS
+        mask = self.mask(row, col, player)
+        othermask = self.mask(row, col, -player)
+        if (mask | othermask) & self.board:
+            return None  # something already on this position
+        return Board(self.board | mask)
+    def __repr__(self):
+        def emit():
+            omask = 1 << 8
+            xmask = omask << 9
+            while omask: # until the mask becomes zero
+                yield "O" if self.board & omask else "X" if self.board & xmask else " "
+                omask >>= 1
+                xmask >>= 1
+        separator = "\n---+---+---\n "
+        return " " + separator.join(" | ".join(g) for g in grouper(emit(), 3))
+    def spaces(self):
+        """tell how many empty spots on the board"""
+        # alternative if no gmpy: bit(self.board).count("1")
+        return 9 - gmpy.popcount(self.board)
+
+    masks = (0b000000111, 0b000111000, 0b111000000, # rows
+             0b001001001, 0b010010010, 0b100100100, # cols
+             0b100010001, 0b001010100               # diags
+            )
+    def won(self):
+        """check winner. Return the winner (+1 or -1) or None"""
+        shifted = self.board >> 9
+        for mask in self.masks:
+            if self.board & mask == mask:
+                return -1
+            if shifted & mask == mask:
+                return 1
+    @property
+    def near(self):
+        """bitmask of the cells within NEAR of a stone, for candidates()"""
+        return mnk.nearby(self.board, 3, 3, NEAR)
+
+def simple_evaluate(board):
+    """simple evaluator: +10, -10 for someone won, 0 for tie. None otherwise"""
+    winner = board.won()
+    if winner == 1:
+        return 10
+    elif winner == -1:
+        return -10
+    if not board.spaces() or board.winnable() == (False, False):
+        return 0
+
+evaluate = simple_evaluate
+
+N = 500  # number of rounds to search
+value_table = None  # tdlearn value table to replace the end of playouts
+ROLLOUT_DEPTH = 0  # number of random moves before looking up value_table
+THREAT_PLAYOUTS = True  # playouts win if they can and block if they must
+
+def mcts(board, player, n=N):
+    """monte carlo tree serach
+
+    Returns:
+        the mean score of the playouts for player, 1 for a win and 0.5 for a
+        tie, or the expected score from value_table of a truncated playout
+    """
+    assert player in PLAYERS
+    if value_table is not None and not ROLLOUT_DEPTH:
+        n = 1  # table lookup without rollout is deterministic
+    count = 0  # sum of the scores
+    for _ in range(n):
+        # outcome in [-1, +1] for X as a score for player
+        count += (1 + player * playout(board, player)) / 2
+    return count / n
+
+EXPLORATION = math.sqrt(2)  # UCT exploration constant
+CHUNK = 1 << 12  # number of nodes the pool grows by when full
+
+class NodePool:
+    """MCTS tree in parallel arrays, node i at index i of each. Node 0 is the
+    root, the position of board with player to move.
+
+    visits and wins are from the view of the player who moved into the node
+    (win = 1, tie = 0.5). first is the index of the first child, -1 before
+    expansion, and count the number of children. move is the bitmask of the
+    stone placed to get into the node, so the board of a node is the board of
+    its parent OR its move.
+    """
+    def __init__(self, chunk=CHUNK):
+        self.chunk = chunk
+        self.clear()
+    def arrays(self):
+        return (self.visits, self.wins, self.first, self.count, self.move, self.parent)
+    def clear(self, board=None, player=-1):
+        """drop the tree and start one of the position"""
+        self.visits = array("I")
+        self.wins = array("d")
+        self.first = array("i")
+        self.count = array("B")
+        self.move = array("I")
+        self.parent = array("i")
+        self.size = 0
+        self.board = board.board if board is not None else 0
+        self.player = player
+        self.allocate([0], -1)
+    def grow(self, n):
+        """add chunks of zeroed nodes until n more nodes fit"""
+        while self.size + n > len(self.visits):
+            for column in self.arrays():
+                column.frombytes(bytes(column.itemsize * self.chunk))
+    def allocate(self, moves, parent):
+        """add a block of nodes of the moves with the same parent, return the
+        index of the first"""
+        self.grow(len(moves))
+        start = self.size
+        for i, move in enumerate(moves, start):
+            self.visits[i] = 0
+            self.wins[i] = 0.0
+            self.first[i] = -1
+            self.count[i] = 0
+            self.move[i] = move
+            self.parent[i] = parent
+        self.size += len(moves)
+        return start
+    def children(self, node):
+        return range(self.first[node], self.first[node] + self.count[node])
+    def nbytes(self):
+        """bytes of the arrays"""
+        return sum(column.itemsize * len(column) for column in self.arrays())
+    def node_bytes(self):
+        """bytes of a node"""
+        return sum(column.itemsize for column in self.arrays())
+    def descendant(self, board, player):
+        """the node of a position below the root, or None if not in the tree"""
+        if self.board & ~board.board or player != self.player * (-1) ** gmpy.popcount(board.board ^ self.board):
+            return None  # not a later position of the game
+        node, stones = 0, self.board
+        while stones != board.board:
+            if self.first[node] < 0:
+                return None
+            node = next((child for child in self.children(node)
+                         if self.move[child] & board.board & ~stones), None)
+            if node is None:
+                return None
+            stones |= self.move[node]
+        return node
+    def advance(self, board, player):
+        """make the position the root, keeping its subtree if in the tree, and
+        compact it to the front of new arrays
+
+        Returns:
+            number of nodes kept
+        """
+        node = self.descendant(board, player)
+        if node is None:
+            self.clear(board, player)
+            return 0
+        visits, wins, first, count, move, _ = self.arrays()
+        self.clear(board, player)
+        self.visits[0], self.wins[0] = visits[node], wins[node]
+        queue = [(node, 0)]  # old index, new index, breadth first
+        for oldnode, newnode in queue:
+            if first[oldnode] < 0:
+                continue
+            oldchildren = range(first[oldnode], first[oldnode] + count[oldnode])
+            start = self.allocate([move[child] for child in oldchildren], newnode)
+            self.first[newnode], self.count[newnode] = start, count[oldnode]
+            for newchild, oldchild in enumerate(oldchildren, start):
+                self.visits[newchild], self.wins[newchild] = visits[oldchild], wins[oldchild]
+                queue.append((oldchild, newchild))
+        return self.size
+
+TREE = NodePool()
+
+def finished(board):
+    """the outcome of a finished game from the view of X in [-1, +1], or None
+    if it goes on"""
+    winner = board.won()
+    if winner:
+        return float(winner)
+    if not board.spaces() or board.winnable() == (False, False):
+        return 0.0
+
+def playout(board, player):
+    """random play from a position until the game ends, or until ROLLOUT_DEPTH
+    moves if value_table is set. Returns the outcome from the view of X in
+    [-1, +1]"""
+    step = Board(board.board)
+    who = player
+    depth = 0
+    while finished(step) is None:
+        if value_table is not None and depth >= ROLLOUT_DEPTH:
+            return tdlearn.value(value_table, step, who)
+        r, c = random.choice(step.moves(who) if THREAT_PLAYOUTS else COORDS)
+        nextstep = step.place(r, c, who)
+        if nextstep is not None:
+            who = -who  # next player's turn
+            depth += 1
+            step = nextstep
+    return finished(step)
+
+def expand(pool, node, board, player):
+    """add the children of a node"""
+    moves = [board.place(r, c, player).board ^ board.board for r, c in board.moves(player)]
+    pool.first[node] = pool.allocate(moves, node)
+    pool.count[node] = len(moves)
+
+def select(pool, node):
+    """the child of maximum UCT value, an unvisited one first"""
+    logn = math.log(max(pool.visits[node], 1))
+    best, bestvalue = None, -float("inf")
+    for child in pool.children(node):
+        visits = pool.visits[child]
+        if not visits:
+            return child
+        value = pool.wins[child] / visits + EXPLORATION * math.sqrt(logn / visits)
+        if value > bestvalue:
+            best, bestvalue = child, value
+    return best
+
+def iterate(pool):
+    """one round of selection, expansion, playout and backup from the root"""
+    node, board, player = 0, Board(pool.board), pool.player
+    while True:
+        result = finished(board)
+        if result is not None:
+            break
+        if pool.first[node] < 0:
+            expand(pool, node, board, player)
+        if not pool.visits[node]:
+            result = playout(board, player)
+            break
+        node = select(pool, node)
+        board = Board(board.board | pool.move[node])
+        player = -player
+    mover = -player  # the player who moved into the node
+    while node >= 0:
+        pool.visits[node] += 1
+        pool.wins[node] += (1 + mover * result) / 2
+        node = pool.parent[node]
+        mover = -mover
+
+def uct(board, player, n=N):
+    """monte carlo tree search in TREE, reusing the subtree of the position if
+    it was searched before
+
+    Returns:
+        the child board of the most visited move and its win fraction for
+        player, and the iterations per second
+    """
+    assert player in PLAYERS
+    TREE.advance(board, player)
+    start = time.perf_counter()
+    for _ in range(n):
+        iterate(TREE)
+    speed = n / (time.perf_counter() - start)
+    if TREE.first[0] < 0:
+        expand(TREE, 0, board, player)  # a finished root, e.g. a dead position
+    children = list(TREE.children(0))
+    random.shuffle(children)  # break ties randomly
+    best = max(children, key=lambda child: TREE.visits[child])
+    return Board(board.board | TREE.move[best]), TREE.wins[best] / max(TREE.visits[best], 1), speed
+
+def play():
+    "auto play tic-tac-toe"
+    opening = book.load()
+    minimizer = True
+    game = Board()
+    # loop until the game is done
+    while not game.won():
+        player = PLAYERS[minimizer]
+        move = book.lookup(opening, game, player) if opening else None
+        if move:
+            game = game.place(move[0], move[1], player)
+            minimizer = not minimizer
+            print("\n%s move from book:" % symbol(player))
+            print(game)
+            continue
+        if not game.spaces():
+            break
+        game, score, speed = uct(game, player)
+        # print board and switch
+        minimizer = not minimizer
+        print("\n%s move on score %f, %d nodes of %d bytes, %.0f iterations/s:" %
+              (symbol(player), score, TREE.size, TREE.node_bytes(), speed))
+        print(game)
+    winner = game.won()
+    if not winner:
+        print("\nTied")
+    else:
+        print("\n%s has won" % symbol(winner))
+
+if __name__ == "__main__":
+    random.seed(int(sys.argv[1]))
+    if len(sys.argv) > 2:
+        value_table = tdlearn.load(sys.argv[2])
+    play()
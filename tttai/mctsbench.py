@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Benchmark of playouts needed for monte carlo searches to find a correct move
+on tactical positions: flat monte carlo and UCT in the node pool of mcts.py,
+and UCT with and without RAVE in mctsgraph.py. Correct moves are from the exact minimax of
+bitalphabeta.py
+"""
+
+import random
+import sys
+
+from tttai import bitalphabeta, mcts, mctsgraph
+
+# tactical positions: row-major cells, with the player to move
+POSITIONS = [
+    ("XX.OO....", 1),   # win at once
+    ("XX..O....", -1),  # must block
+    ("X...O...X", -1),  # avoid the fork: play an edge
+    ("X.......O", 1),   # set up a fork
+    (".X..O....", -1),  # O to press the attack
+    ("O...X..X.", -1),  # block and avoid the fork
+]
+BUDGETS = [int(2**(k/2)) for k in range(6, 25)]  # 8 to 4096 playouts
+THRESHOLD = 0.9  # fraction of trials that must pick a correct move
+
+def parse(text):
+    """convert a row-major string of X, O and . into a bitboard int"""
+    board = mctsgraph.Board()
+    for (r, c), cell in zip(mctsgraph.COORDS, text):
+        if cell != ".":
+            board = board.place(r, c, 1 if cell == "X" else -1)
+    return board.board
+
+def correct_moves(bitboard, player):
+    """set of child bitboards that keep the minimax value"""
+    board = bitalphabeta.Board(bitboard)
+    children = [b for b in [board.place(r, c, player) for r, c in bitalphabeta.COORDS] if b]
+    scores = [bitalphabeta.simple_minimax(b, -player) for b in children]
+    best = max(scores) if player == 1 else min(scores)
+    return {b.board for b, score in zip(children, scores) if score == best}
+
+def flat(bitboard, player, budget):
+    """flat monte carlo as in mcts.play(), budget shared by all candidates"""
+    board = mcts.Board(bitboard)
+    children = [b for b in [board.place(r, c, player) for r, c in mcts.COORDS] if b]
+    n = max(1, budget // len(children))
+    candidates = [(b, mcts.mcts(b, -player, n)) for b in children]
+    random.shuffle(candidates)
+    return min(candidates, key=lambda pair: pair[1])[0].board
+
+def tree(bitboard, player, budget):
+    """UCT in the node pool of mcts.py, from a new tree"""
+    mcts.TREE.clear()
+    return mcts.uct(mcts.Board(bitboard), player, budget)[0].board
+
+def graph(beta):
+    """monte carlo search on transposition graph with a RAVE beta schedule"""
+    def search(bitboard, player, budget):
+        mctsgraph.rave_beta = beta
+        mctsgraph.GRAPH.clear()
+        return mctsgraph.mctsgraph(mctsgraph.Board(bitboard), player, budget)[0].board
+    return search
+
+ENGINES = [
+    ("flat", flat),
+    ("tree", tree),
+    ("uct", graph(None)),
+    ("rave", graph(mctsgraph.equivalence_beta)),
+    ("rave-mse", graph(mctsgraph.mse_beta)),
+]
+
+def playouts_to_correct(engine, bitboard, player, trials):
+    """smallest budget that picks a correct move in THRESHOLD of trials, or
+    None if no budget does"""
+    correct = correct_moves(bitboard, player)
+    for budget in BUDGETS:
+        hits = sum(engine(bitboard, player, budget) in correct for _ in range(trials))
+        if hits >= THRESHOLD * trials:
+            return budget
+
+def main():
+    "run the benchmark and print a table"
+    trials = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print("%-12s %-3s" % ("position", "to") + "".join("%10s" % name for name, _ in ENGINES))
+    total = {name: 0 for name, _ in ENGINES}
+    for text, player in POSITIONS:
+        row = "%-12s %-3s" % (text, mctsgraph.symbol(player))
+        for name, engine in ENGINES:
+            budget = playouts_to_correct(engine, parse(text), player, trials)
+            total[name] += budget or 2*BUDGETS[-1]
+            row += "%10s" % (budget or ">%d" % BUDGETS[-1])
+        print(row)
+    print("%-16s" % "total" + "".join("%10d" % total[name] for name, _ in ENGINES))
+
+if __name__ == "__main__":
+    random.seed(int(sys.argv[1]))
+    main()
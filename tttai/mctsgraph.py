@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tic-tac-toe using monte carlo tree search on a transposition graph
+
+Positions reached by different move orders share one node, keyed by the
+bitboard and the player to move. Proven wins, losses and draws are backed up
+in MCTS-Solver style so solved subtrees do not consume any more playouts.
+Optionally, RAVE (all-moves-as-first statistics) is blended into the UCT value
+with a configurable beta schedule. Random playouts can be truncated or replaced
+by a lookup in a value table learned by tdlearn.py.
+"""
+
+import math
+import random
+import sys
+import itertools
+
+import gmpy
+
+from tttai import book, mnk, tdlearn
+
+PLAYERS = [1, -1]  # maximizer == 1
+COORDS = [(r, c) for r in range(3) for c in range(3)]
+NEAR = 0  # generate moves within this distance of a stone, 0 for all cells
+
+def symbol(code):
+    """Return the symbol of player"""
+    assert code in PLAYERS
+    return "X" if code == 1 else "O"
+
+def grouper(iterable, n, fillvalue=None):
+    # function copied from Python doc, itertools module
+    args = [iter(iterable)] * n
+    return itertools.zip_longest(*args, fillvalue=fillvalue)
+
+class Board(mnk.Board):
+    """bit-vector based tic-tac-toe board, the 3,3,3 board of mnk.py with its
+    winnable(), threats(), candidates() and moves()"""
+    def __init__(self, board=0):
+        self.board = board
+    def mask(self, row, col, player):
+        """Produce the bitmask for row and col
+        The 18-bit vector is row-major, with matrix cell (0,0) the MSB. And the
+        higher 9-bit is for 1 (X) and lower 9-bit is for -1 (O)
+
+        Args:
+            row, col: integers from 0 to 2 inclusive
+        """
+        offset = 3*(2-row) + (2-col)
+        if player == 1:
+            offset += 9
+        return 1 << offset
+    def place(self, row, col, player):
+        """produce a new board with row and col set to a symbol. Return None if
+        some symbol already set.
+
+        Args:
+            what: either +1 or -1
+        """
+        assert player in PLAYERS
+        mask = self.mask(row, col, player)
+        othermask = self.mask(row, col, -player)
+        if (mask | othermask) & self.board:
+            return None  # something already on this position
+        return Board(self.board | mask)
+    def __repr__(self):
+        def emit():
+            omask = 1 << 8
+            xmask = omask << 9
+            while omask: # until the mask becomes zero
+                yield "O" if self.board & omask else "X" if self.board & xmask else " "
+                omask >>= 1
+                xmask >>= 1
+        separator = "\n---+---+---\n "
+        return " " + separator.join(" | ".join(g) for g in grouper(emit(), 3))
+    def spaces(self):
+        """tell how many empty spots on the board"""
+        # alternative if no gmpy: bit(self.board).count("1")
+        return 9 - gmpy.popcount(self.board)
+
+    masks = (0b000000111, 0b000111000, 0b111000000, # rows
+             0b001001001, 0b010010010, 0b100100100, # cols
+             0b100010001, 0b001010100               # diags
+            )
+    def won(self):
+        """check winner. Return the winner (+1 or -1) or None"""
+        shifted = self.board >> 9
+        for mask in self.masks:
+            if self.board & mask == mask:
+                return -1
+            if shifted & mask == mask:
+                return 1
+    @property
+    def near(self):
+        """bitmask of the cells within NEAR of a stone, for candidates()"""
+        return mnk.nearby(self.board, 3, 3, NEAR)
+
+N = 500  # number of playouts per move
+EXPLORATION = math.sqrt(2)  # UCT exploration constant
+RAVE_EQUIVALENCE = 500  # k of the hand-selected RAVE schedule
+RAVE_BIAS = 0.1  # b of the minimum MSE RAVE schedule
+
+def equivalence_beta(visits, amafvisits):
+    """hand-selected RAVE schedule of Gelly and Silver, beta = sqrt(k/(3n+k)),
+    such that AMAF and UCT values weigh equally at n = k visits"""
+    return math.sqrt(RAVE_EQUIVALENCE / (3*visits + RAVE_EQUIVALENCE))
+
+def mse_beta(visits, amafvisits):
+    """minimum MSE RAVE schedule of Silver, beta = m/(n + m + 4nmb^2) with n
+    UCT visits, m AMAF visits, and b the assumed bias of AMAF values"""
+    return amafvisits / (visits + amafvisits + 4*visits*amafvisits*RAVE_BIAS**2)
+
+# set to a beta schedule, e.g. equivalence_beta or mse_beta, to enable RAVE
+rave_beta = None
+value_table = None  # tdlearn value table to replace the end of playouts
+ROLLOUT_DEPTH = 0  # number of random moves before looking up value_table
+THREAT_PLAYOUTS = True  # playouts win if they can and block if they must
+
+class Node:
+    """Statistics of one position in the search graph
+
+    visits and score are from the view of the player who moved into this
+    position (win = 1, tie = 0.5). proven is the solved game value from the view
+    of the player to move: +1 win, -1 loss, 0 tie, or None if not yet solved.
+    children is the list of child bitboards, or None before expansion. amaf
+    maps each child bitboard to its [visits, score] of all-moves-as-first
+    statistics, from the view of the player to move, if RAVE is enabled.
+    """
+    __slots__ = ("visits", "score", "proven", "children", "amaf")
+    def __init__(self):
+        self.visits = 0
+        self.score = 0.0
+        self.proven = None
+        self.children = None
+        self.amaf = None
+
+GRAPH = {}
+
+def lookup(board, player):
+    """find or create the node of a position with player to move"""
+    key = (board.board, player)
+    node = GRAPH.get(key)
+    if node is None:
+        node = GRAPH[key] = Node()
+        winner = board.won()
+        if winner:
+            node.proven = 1 if winner == player else -1
+        elif not board.spaces() or board.winnable() == (False, False):
+            node.proven = 0
+    return node
+
+def expand(node, board, player):
+    """create the child nodes of a position"""
+    children = [board.place(r, c, player) for r, c in board.moves(player)]
+    node.children = [b.board for b in children if b]
+    for child in node.children:
+        lookup(Board(child), -player)
+    if rave_beta is not None:
+        node.amaf = {child: [0, 0.0] for child in node.children}
+
+def prove(node, player):
+    """MCTS-Solver backup: set node.proven from the proven values of children.
+    One losing child proves a win, otherwise all children must be proven"""
+    if node.proven is not None or node.children is None:
+        return node.proven
+    values = [GRAPH[(child, -player)].proven for child in node.children]
+    if -1 in values:
+        node.proven = 1
+    elif None not in values:
+        node.proven = max(-v for v in values)
+    return node.proven
+
+def select(node, player):
+    """pick the unsolved child of maximum UCT value, return its bitboard"""
+    logn = math.log(max(node.visits, 1))
+    best, bestvalue = None, -float("inf")
+    for child in node.children:
+        childnode = GRAPH[(child, -player)]
+        if childnode.proven is not None:
+            continue  # solved subtree, no more playouts needed
+        amafvisits, amafscore = node.amaf[child] if node.amaf else (0, 0)
+        if not childnode.visits:
+            if not amafvisits:
+                return child
+            # unvisited but with AMAF estimate: use it as if visited once
+            value = amafscore / amafvisits + EXPLORATION * math.sqrt(logn)
+        else:
+            value = childnode.score / childnode.visits
+            if amafvisits:
+                beta = rave_beta(childnode.visits, amafvisits)
+                value = (1-beta) * value + beta * amafscore / amafvisits
+            value += EXPLORATION * math.sqrt(logn / childnode.visits)
+        if value > bestvalue:
+            best, bestvalue = child, value
+    return best
+
+def playout(board, player):
+    """random play from a position until the game ends, or until ROLLOUT_DEPTH
+    moves if value_table is set
+
+    Returns:
+        the outcome from the view of X in [-1, +1], and the list of bitmasks
+        of the moves played
+    """
+    step = Board(board.board)
+    who = player
+    moves = []
+    while step.spaces():
+        if value_table is not None and len(moves) >= ROLLOUT_DEPTH:
+            return tdlearn.value(value_table, step, who), moves
+        r, c = random.choice(step.moves(who) if THREAT_PLAYOUTS else COORDS)
+        nextstep = step.place(r, c, who)
+        if nextstep is not None:
+            who = -who  # next player's turn
+            moves.append(nextstep.board ^ step.board)
+            step = nextstep
+            if step.won() or step.winnable() == (False, False):
+                break  # someone won, or a tie already
+    return float(step.won() or 0), moves
+
+def iterate(board, player):
+    """one round of selection, expansion, playout and backup from the root"""
+    path = []  # (node, player to move, bitboard) from root to leaf
+    moves = []  # bitmasks of moves played after the root
+    node = lookup(board, player)
+    while True:
+        path.append((node, player, board.board))
+        if node.children is None and node.proven is None:
+            expand(node, board, player)
+        if prove(node, player) is not None:
+            # solved node: the game value substitutes the playout
+            result = float(player * node.proven)
+            break
+        if not node.visits:
+            result, playoutmoves = playout(board, player)
+            moves.extend(playoutmoves)
+            break
+        child = select(node, player)
+        moves.append(child ^ board.board)
+        board = Board(child)
+        player = -player
+        node = GRAPH[(board.board, player)]
+    for depth in reversed(range(len(path))):
+        node, player, bitboard = path[depth]
+        node.visits += 1
+        reward = (1 + player * result) / 2  # for the player to move
+        node.score += 1 - reward  # for the player who moved into this node
+        if node.amaf:
+            # any later move of this player counts as if played first here;
+            # the bitmask includes the player so opponent moves never match
+            for mask in moves[depth:]:
+                stats = node.amaf.get(bitboard | mask)
+                if stats is not None:
+                    stats[0] += 1
+                    stats[1] += reward
+        prove(node, player)
+
+def mctsgraph(board, player, n=N):
+    """monte carlo tree search on the transposition graph
+
+    Returns:
+        the child board of the best move for player, and its score
+    """
+    assert player in PLAYERS
+    root = lookup(board, player)
+    for _ in range(n):
+        if root.proven is not None:
+            break  # nothing left to search
+        iterate(board, player)
+    def rank(child):
+        node = GRAPH[(child, -player)]
+        if node.proven is not None:
+            return (-node.proven, 0.5 - node.proven / 2)
+        return (0, node.score / node.visits if node.visits else 0)
+    if root.children is None:
+        expand(root, board, player)  # root solved at lookup, e.g. a dead position
+    children = list(root.children)
+    random.shuffle(children)  # break ties randomly
+    best = max(children, key=rank)
+    return Board(best), rank(best)[1]
+
+def play():
+    "auto play tic-tac-toe"
+    opening = book.load()
+    minimizer = True
+    game = Board()
+    # loop until the game is done
+    while not game.won():
+        player = PLAYERS[minimizer]
+        if not game.spaces():
+            break
+        move = book.lookup(opening, game, player) if opening else None
+        if move:
+            game = game.place(move[0], move[1], player)
+            minimizer = not minimizer
+            print("\n%s move from book:" % symbol(player))
+            print(game)
+            continue
+        game, score = mctsgraph(game, player)
+        # print board and switch
+        minimizer = not minimizer
+        print("\n%s move on score %f, %d nodes in graph:" % (symbol(player), score, len(GRAPH)))
+        print(game)
+    winner = game.won()
+    if not winner:
+        print("\nTied")
+    else:
+        print("\n%s has won" % symbol(winner))
+
+if __name__ == "__main__":
+    random.seed(int(sys.argv[1]))
+    if len(sys.argv) > 2:
+        value_table = tdlearn.load(sys.argv[2])
+    play()
@@ -10,8 +10,10 @@ import random
 import sys
 from typing import List, Optional
 
+from tttai import book
+from tttai.searchstats import SearchStats
+
 PLAYERS = ["X", "O"]  # maximizer == "X"
-COUNT = 0
 
 class Board:
     """simple tic-tac-toe board"""
@@ -89,17 +91,20 @@ def heuristic_evaluate(board):
 # If set this to heuristic_evaluate, the game will go without tree search
 evaluate = simple_evaluate
 
-def minimax(board, player):
+def minimax(board, player, stats=None, ply=0):
     """player to move one step on the board, find the minimax (best of the worse case) score"""
-    global COUNT
-    COUNT += 1
+    if stats is None:
+        stats = SearchStats()
+    stats.visit(ply)
     assert player in PLAYERS
     opponent = "O" if player == "X" else "X"
     value = evaluate(board)
     if value is not None:
+        stats.terminals += 1
         return value  # exact score of the board
+    stats.expanded += 1
     # possible opponent moves: The worse case scores in different options
-    candscores = [minimax(b, opponent) for b in [board.place(r, c, player) for r in range(3) for c in range(3)] if b]
+    candscores = [minimax(b, opponent, stats, ply+1) for b in [board.place(r, c, player) for r in range(3) for c in range(3)] if b]
     # evaluate the best of worse case scores
     if player == "X":
         return max(candscores)
@@ -108,15 +113,22 @@ def minimax(board, player):
 
 def play():
     "auto play tic-tac-toe"
-    global COUNT
+    opening = book.load()
     minimizer = True
     game = Board()
     # loop until the game is done
     while not game.won():
         player = PLAYERS[minimizer]
         opponent = PLAYERS[not minimizer]
-        COUNT = 0
-        candidates = [(b, minimax(b, opponent)) for b in [game.place(r, c, player) for r in range(3) for c in range(3)] if b]
+        move = book.lookup(opening, game, player) if opening else None
+        if move:
+            game = game.place(move[0], move[1], player)
+            minimizer = not minimizer
+            print("\n%s move from book:" % player)
+            print(game)
+            continue
+        stats = SearchStats()
+        candidates = [(b, minimax(b, opponent, stats=stats, ply=1)) for b in [game.place(r, c, player) for r in range(3) for c in range(3)] if b]
         if not candidates:
             break
         random.shuffle(candidates)
@@ -127,7 +139,7 @@ def play():
             game = min(candidates, key=lambda pair: pair[1])[0]
         # print board and switch
         minimizer = not minimizer
-        print("\n%s move after %d search steps:" % (player, COUNT))
+        print("\n%s move after %d search steps:" % (player, stats.nodes))
         print(game)
     # show result
     winner = game.won()
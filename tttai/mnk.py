@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Bitboard of m,n,k-games: k in a row wins on a board of m rows and n columns
+
+The layout is that of the Board of bitalphabeta.py for any size: the bitboard
+has 2*m*n bits, row-major with cell (0,0) the MSB, the higher m*n bits for X
+(+1) and the lower m*n bits for O (-1). So the 3,3,3 board is bit for bit the
+bitboard of the tic-tac-toe engines.
+
+The size is not stored in each Board: geometry() makes a Board subclass for a
+size, with the size and the masks of all lines of k cells as class attributes,
+so that a Board object holds only the bitboard int and its Zobrist key.
+
+The Zobrist key is the XOR of a random 64-bit number of each stone on the
+board, kept up to date by place() and undo() with one XOR, so that a
+transposition table can be keyed by a 64-bit int however large the board.
+
+On a large board almost all good moves are near the stones already placed. A
+geometry of distance d > 0 keeps the bitmask of the cells within d rows and
+columns of a stone, updated by place() with one OR, and moves() generates only
+the empty cells of it, or all empty cells if none. Distance 0, the default,
+generates all empty cells, as an exact solver must.
+"""
+
+import functools
+import itertools
+import random
+
+import gmpy
+
+PLAYERS = [1, -1]  # maximizer == 1
+
+def symbol(code):
+    """Return the symbol of player"""
+    assert code in PLAYERS
+    return "X" if code == 1 else "O"
+
+def lines(rows, cols, k):
+    """masks of all lines of k cells on a rows x cols board, rows first, then
+    columns, diagonals and anti-diagonals"""
+    cells = rows * cols
+    def bit(r, c):
+        return 1 << (cells - 1 - (r*cols + c))
+    masks = []
+    for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        for r, c in itertools.product(range(rows), range(cols)):
+            end_r, end_c = r + dr*(k-1), c + dc*(k-1)
+            if 0 <= end_r < rows and 0 <= end_c < cols:
+                masks.append(sum(bit(r + dr*i, c + dc*i) for i in range(k)))
+    return tuple(masks)
+
+def zobrist(rows, cols, k):
+    """random 64-bit numbers of each bit of the bitboard, and of O to move,
+    the same for every run"""
+    rng = random.Random("%dx%dk%d" % (rows, cols, k))
+    return [rng.getrandbits(64) for _ in range(2 * rows * cols)], rng.getrandbits(64)
+
+@functools.lru_cache(maxsize=None)
+def neighborhood(rows, cols, distance):
+    """masks of the cells within distance rows and columns of each cell, in
+    the lower layout of -1 (O), indexed by bit position"""
+    cells = rows * cols
+    masks = [0] * cells
+    for r, c in itertools.product(range(rows), range(cols)):
+        for r2 in range(max(0, r - distance), min(rows, r + distance + 1)):
+            for c2 in range(max(0, c - distance), min(cols, c + distance + 1)):
+                masks[cells - 1 - (r*cols + c)] |= 1 << (cells - 1 - (r2*cols + c2))
+    return tuple(masks)
+
+def nearby(board, rows, cols, distance):
+    """bitmask of the cells within distance of a stone of the bitboard, in the
+    lower layout of -1 (O), computed from the stones; 0 if distance is 0"""
+    if not distance:
+        return 0
+    cells = rows * cols
+    masks = neighborhood(rows, cols, distance)
+    stones = (board | board >> cells) & ((1 << cells) - 1)
+    mask = 0
+    while stones:
+        low = stones & -stones
+        mask |= masks[low.bit_length() - 1]
+        stones ^= low
+    return mask
+
+class Board:
+    """bit-vector based m,n,k board, use geometry() for the subclass of a size
+
+    Args:
+        board: the bitboard
+        key: its Zobrist key, computed from the board if None
+        near: the cells near a stone, computed from the board if None
+    """
+    __slots__ = ("board", "key", "near")
+    rows = cols = k = 3
+    cells = 9
+    coords = [(r, c) for r in range(3) for c in range(3)]
+    masks = lines(3, 3, 3)
+    zobrist, zside = zobrist(3, 3, 3)
+    distance = 0  # generate moves within this distance of a stone, 0 for all
+    neighbors = ()  # neighborhood() of the distance
+    def __init__(self, board=0, key=None, near=None):
+        self.board = board
+        if key is None:
+            key = 0
+            bits = board
+            while bits:
+                low = bits & -bits
+                key ^= self.zobrist[low.bit_length() - 1]
+                bits ^= low
+        self.key = key
+        if near is None:
+            near = nearby(board, self.rows, self.cols, self.distance)
+        self.near = near
+    def offset(self, row, col, player):
+        """bit position of row and col of player"""
+        offset = self.cells - 1 - (row*self.cols + col)
+        if player == 1:
+            offset += self.cells
+        return offset
+    def mask(self, row, col, player):
+        """Produce the bitmask for row and col of player"""
+        return 1 << self.offset(row, col, player)
+    def zkey(self, player):
+        """the Zobrist key of the position with player to move"""
+        return self.key ^ self.zside if player == -1 else self.key
+    def place(self, row, col, player):
+        """produce a new board with row and col set to a symbol. Return None if
+        some symbol already set.
+
+        Args:
+            what: either +1 or -1
+        """
+        assert player in PLAYERS
+        offset = self.offset(row, col, player)
+        othermask = self.mask(row, col, -player)
+        if (1 << offset | othermask) & self.board:
+            return None  # something already on this position
+        near = self.near | self.neighbors[offset % self.cells] if self.distance else 0
+        return type(self)(self.board | 1 << offset, self.key ^ self.zobrist[offset], near)
+    def undo(self, row, col, player):
+        """produce a new board with the symbol of player on row and col removed"""
+        offset = self.offset(row, col, player)
+        assert self.board & 1 << offset
+        # the cells near a stone cannot be undone by one mask, recompute them
+        return type(self)(self.board ^ 1 << offset, self.key ^ self.zobrist[offset])
+    def text(self):
+        """row-major cells of X, O and ., e.g. "X...O..." """
+        return "".join("X" if self.board & self.mask(r, c, 1) else "O" if self.board & self.mask(r, c, -1) else "."
+                       for r, c in self.coords)
+    def __repr__(self):
+        def emit():
+            omask = 1 << (self.cells - 1)
+            xmask = omask << self.cells
+            while omask: # until the mask becomes zero
+                yield "O" if self.board & omask else "X" if self.board & xmask else " "
+                omask >>= 1
+                xmask >>= 1
+        args = [iter(emit())] * self.cols
+        separator = "\n" + "+".join(["---"] * self.cols) + "\n "
+        return " " + separator.join(" | ".join(g) for g in zip(*args))
+    def spaces(self):
+        """tell how many empty spots on the board"""
+        return self.cells - gmpy.popcount(self.board)
+    def won(self):
+        """check winner. Return the winner (+1 or -1) or None"""
+        shifted = self.board >> self.cells
+        for mask in self.masks:
+            if self.board & mask == mask:
+                return -1
+            if shifted & mask == mask:
+                return 1
+    def winnable(self):
+        """tell who can still win: a player can if some line has no stone of
+        the opponent. Return (X can win, O can win)"""
+        shifted = self.board >> self.cells
+        xcan = ocan = False
+        for mask in self.masks:
+            if not self.board & mask:
+                xcan = True
+            if not shifted & mask:
+                ocan = True
+            if xcan and ocan:
+                break
+        return xcan, ocan
+    def threats(self, player):
+        """bitmask of the empty cells that complete a line of player, in the
+        lower layout of -1 (O)"""
+        own, other = self.board, self.board >> self.cells
+        if player == 1:
+            own, other = other, own
+        cells = 0
+        for mask in self.masks:
+            if not other & mask and gmpy.popcount(own & mask) == self.k - 1:
+                cells |= mask & ~own
+        return cells
+    def candidates(self):
+        """bitmask of the empty cells near a stone, or of all empty cells if
+        none is near or the distance is 0, in the lower layout of -1 (O)"""
+        empty = ~(self.board | self.board >> self.cells) & ((1 << self.cells) - 1)
+        return self.near & empty or empty
+    def moves(self, player):
+        """empty cells (row, col) worth playing for player: the cells that win
+        at once if any, else the cells that block a win of the opponent if
+        any, else the candidates(), in row-major order"""
+        cells = self.threats(player) or self.threats(-player) or self.candidates()
+        moves = []
+        while cells:
+            low = cells & -cells
+            moves.append(divmod(self.cells - low.bit_length(), self.cols))
+            cells ^= low
+        moves.reverse()
+        return moves
+
+def geometry(rows, cols, k, distance=0):
+    """the Board subclass of a rows x cols board with k in a row to win, that
+    generates moves within distance of a stone, or all moves if 0"""
+    attrs = {
+        "__slots__": (),
+        "rows": rows,
+        "cols": cols,
+        "k": k,
+        "cells": rows * cols,
+        "coords": [(r, c) for r in range(rows) for c in range(cols)],
+        "masks": lines(rows, cols, k),
+        "distance": distance,
+        "neighbors": neighborhood(rows, cols, distance) if distance else (),
+    }
+    attrs["zobrist"], attrs["zside"] = zobrist(rows, cols, k)
+    return type("Board%dx%dk%d" % (rows, cols, k), (Board,), attrs)
+
+def parse(cls, text):
+    """the Board of Board subclass cls from row-major cells of X, O and ."""
+    board = cls()
+    for (r, c), cell in zip(cls.coords, text):
+        if cell in "XO":
+            board = board.place(r, c, 1 if cell == "X" else -1)
+    return board
+
+def symmetries(rows, cols):
+    """permutations of the cell indices r*cols+c by the symmetries of the
+    board: reflections and rotations, 8 of a square and 4 of a rectangle"""
+    maps = [lambda r, c: (r, c), lambda r, c: (rows-1-r, c),
+            lambda r, c: (r, cols-1-c), lambda r, c: (rows-1-r, cols-1-c)]
+    if rows == cols:
+        maps += [lambda r, c: (c, r), lambda r, c: (c, rows-1-r),
+                 lambda r, c: (cols-1-c, r), lambda r, c: (cols-1-c, rows-1-r)]
+    return [[f(r, c)[0]*cols + f(r, c)[1] for r in range(rows) for c in range(cols)] for f in maps]
+
+def transform(board, permutation):
+    """the Board after moving cell i to permutation[i]"""
+    bitboard = 0
+    for i, (r, c) in enumerate(board.coords):
+        r2, c2 = divmod(permutation[i], board.cols)
+        for player in PLAYERS:
+            if board.board & board.mask(r, c, player):
+                bitboard |= board.mask(r2, c2, player)
+    return type(board)(bitboard)
+
+def canonical(board):
+    """the symmetric Board of smallest bitboard, and the permutation to it"""
+    return min(((transform(board, p), p) for p in symmetries(board.rows, board.cols)),
+               key=lambda pair: pair[0].board)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Depth-limited search of m,n,k-games on large boards
+
+On a board like 15x15 the game cannot be solved, so the search goes to a fixed
+depth and scores the leaves with the line count heuristic of
+heuristic_evaluate() in negascout.py: +10**(n-1) for each line of n stones of
+X and none of O, and the negative for O. The score is updated incrementally
+as a stone changes only the lines through its cell, and children are searched
+in the order of the score they gain. The search is principal variation search
+in negamax form, the score from the view of the player to move, deepened one
+ply at a time until the time budget runs out. Only moves within DISTANCE rows
+and columns of a stone are searched, from the neighborhood mask of mnk.py.
+
+Two reductions make it go deeper:
+
+- Null-move pruning: in an m,n,k-game an extra stone never hurts the side who
+  places it, so if the player to move is still at or above beta after passing
+  and a search of NULL_REDUCTION plies less, the node is cut. Passing is not
+  tried if the opponent has a line to complete on the next move.
+- Late-move reductions: the moves after the first LMR_MOVES in the order are
+  searched LMR_REDUCTION plies less with a zero window, and searched again at
+  full depth if they fail high.
+
+Usage:
+    python3 -m tttai.mnksearch 15 15 5 --seconds 10
+    python3 -m tttai.mnksearch 15 15 5 --seconds 10 --compare
+"""
+
+import argparse
+import time
+
+import gmpy
+
+from tttai import mnk
+from tttai.searchstats import SearchStats
+
+WIN = 1 << 40  # score of a win, less the plies to it
+SECONDS = 10.0  # time budget of a move
+MAX_DEPTH = 64  # depth limit of iterative deepening
+NULL_MOVE = True  # null-move pruning
+NULL_REDUCTION = 2  # plies less for the search after a null move
+LMR = True  # late-move reductions
+LMR_MOVES = 3  # moves searched at full depth before reducing
+LMR_REDUCTION = 1  # plies less for a late move
+DISTANCE = 2  # search moves within this distance of a stone, 0 for all
+OPENING = "7,7 7,8 8,8 6,6 8,7 8,6"  # moves played before the search, O first
+
+class Timeout(Exception):
+    """the time budget ran out in the middle of a search"""
+
+def line_value(own, other):
+    """heuristic score of a line of own and other stones, for own"""
+    if other:
+        return 0 if own else -10**(other-1)
+    return 10**(own-1) if own else 0
+
+class Search:
+    """iterative deepening principal variation search on a Board subclass
+    from mnk.geometry()
+
+    Args:
+        cls: the Board subclass
+        null_move, lmr: enable null-move pruning and late-move reductions
+    """
+    def __init__(self, cls, null_move=NULL_MOVE, lmr=LMR):
+        self.cls = cls
+        self.null_move = null_move
+        self.lmr = lmr
+        self.through = [[] for _ in range(cls.cells)]  # masks of lines through each cell
+        for mask in cls.masks:
+            bits = mask
+            while bits:
+                low = bits & -bits
+                self.through[cls.cells - low.bit_length()].append(mask)
+                bits ^= low
+        # values[x][o]: heuristic score for X of a line of x and o stones
+        self.values = [[line_value(x, o) for o in range(cls.k+1)] for x in range(cls.k+1)]
+        self.stats = SearchStats()
+        self.nulls = self.reductions = 0  # null-move cuts, reduced moves
+        self.deadline = None
+        self.completed = []  # seconds from the start when each depth finished
+    def evaluate(self, board):
+        """heuristic score of the board for X"""
+        xboard = board.board >> board.cells
+        return sum(self.values[gmpy.popcount(xboard & mask)][gmpy.popcount(board.board & mask)]
+                   for mask in board.masks)
+    def gain(self, board, row, col, player):
+        """change of the score for X by player placing at row and col, and
+        whether it completes a line"""
+        oboard = board.board
+        xboard = oboard >> board.cells
+        delta, wins = 0, False
+        for mask in self.through[row*board.cols + col]:
+            x, o = gmpy.popcount(xboard & mask), gmpy.popcount(oboard & mask)
+            if player == 1:
+                delta += self.values[x+1][o] - self.values[x][o]
+                wins = wins or (x + 1 == board.k and not o)
+            else:
+                delta += self.values[x][o+1] - self.values[x][o]
+                wins = wins or (o + 1 == board.k and not x)
+        return delta, wins
+    def children(self, board, player):
+        """(gain for player, wins, row, col) of the moves, best gain first"""
+        moves = []
+        for r, c in board.moves(player):
+            delta, wins = self.gain(board, r, c, player)
+            moves.append((player * delta, wins, r, c))
+        moves.sort(reverse=True)
+        return moves
+    def search(self, board, player, score, depth, alpha, beta, ply=0, null=True):
+        """negamax score of the board for player to move, score the heuristic
+        for X, searched depth plies more"""
+        self.stats.visit(ply)
+        if self.stats.nodes % 1024 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout()
+        if not board.spaces():
+            self.stats.terminals += 1
+            return 0
+        if depth <= 0:
+            self.stats.terminals += 1
+            return player * score
+        if self.null_move and null and depth > 1 and not board.threats(-player):
+            value = -self.search(board, -player, score, max(0, depth-1-NULL_REDUCTION), -beta, -beta+1, ply+1, False)
+            if value >= beta:
+                self.nulls += 1
+                return beta  # the null search is not exact, only a bound
+        self.stats.expanded += 1
+        best = -WIN
+        for n, (delta, wins, r, c) in enumerate(self.children(board, player)):
+            if wins:
+                value = WIN - ply - 1
+            else:
+                child = board.place(r, c, player)
+                childscore = score + player * delta
+                if n == 0:
+                    value = -self.search(child, -player, childscore, depth-1, -beta, -alpha, ply+1)
+                else:
+                    reduction = LMR_REDUCTION if self.lmr and n >= LMR_MOVES and depth > LMR_REDUCTION + 1 else 0
+                    self.reductions += bool(reduction)
+                    value = -self.search(child, -player, childscore, depth-1-reduction, -alpha-1, -alpha, ply+1)
+                    if value > alpha and reduction:
+                        # fail high on the reduced search, search again at full depth
+                        self.stats.researches += 1
+                        value = -self.search(child, -player, childscore, depth-1, -alpha-1, -alpha, ply+1)
+                    if alpha < value < beta:
+                        self.stats.researches += 1
+                        value = -self.search(child, -player, childscore, depth-1, -beta, -alpha, ply+1)
+            best = max(best, value)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                self.stats.cutoff("beta", n)
+                break
+        return best
+    def best_move(self, board, player, seconds=SECONDS):
+        """deepen until the time budget runs out
+
+        Returns:
+            (row, col) and score of the best move of the deepest search
+            completed, and the depth of it, or None if the game is over
+        """
+        if board.won() or not board.spaces():
+            return None
+        start = time.perf_counter()
+        self.deadline = start + seconds
+        self.completed = []
+        score = self.evaluate(board)
+        moves = self.children(board, player)
+        best = (moves[0][2], moves[0][3]), None, 0
+        for depth in range(1, MAX_DEPTH + 1):
+            alpha, found = -WIN - 1, None
+            try:
+                for delta, wins, r, c in moves:
+                    if wins:
+                        value = WIN
+                    else:
+                        child = board.place(r, c, player)
+                        value = -self.search(child, -player, score + player * delta, depth-1, -WIN - 1, -alpha, 1)
+                    if value > alpha:
+                        alpha, found = value, (delta, wins, r, c)
+            except Timeout:
+                break
+            best = (found[2], found[3]), alpha, depth
+            self.completed.append(time.perf_counter() - start)
+            # search the best move first at the next depth
+            moves.remove(found)
+            moves.insert(0, found)
+            if abs(alpha) >= WIN - MAX_DEPTH or depth >= board.spaces():
+                break  # a forced win or loss found, or searched to the end
+        return best
+
+def parse_moves(cls, text):
+    """the Board after the moves "r,c r,c ..." alternately by O and X, and
+    the player to move"""
+    board, player = cls(), -1
+    for move in text.split():
+        r, c = map(int, move.split(","))
+        board = board.place(r, c, player)
+        if board is None:
+            raise ValueError("cell %s is taken" % move)
+        player = -player
+    return board, player
+
+def main():
+    "parse arguments and search"
+    parser = argparse.ArgumentParser(description="depth-limited search of an m,n,k-game")
+    parser.add_argument("rows", type=int, nargs="?", default=15, help="number of rows")
+    parser.add_argument("cols", type=int, nargs="?", default=15, help="number of columns")
+    parser.add_argument("k", type=int, nargs="?", default=5, help="number in a row to win")
+    parser.add_argument("--moves", default=OPENING, help='moves "r,c r,c ..." played first, O first')
+    parser.add_argument("--seconds", type=float, default=SECONDS, help="time budget of the search")
+    parser.add_argument("--distance", type=int, default=DISTANCE, help="search moves within this distance of a stone, 0 for all")
+    parser.add_argument("--no-null", action="store_true", help="disable null-move pruning")
+    parser.add_argument("--no-lmr", action="store_true", help="disable late-move reductions")
+    parser.add_argument("--compare", action="store_true", help="search with and without each reduction")
+    args = parser.parse_args()
+    cls = mnk.geometry(args.rows, args.cols, args.k, args.distance)
+    board, player = parse_moves(cls, args.moves)
+    print(board)
+    if args.compare:
+        configs = [(False, False), (True, False), (False, True), (True, True)]
+    else:
+        configs = [(not args.no_null, not args.no_lmr)]
+    for null_move, lmr in configs:
+        search = Search(cls, null_move, lmr)
+        result = search.best_move(board, player, args.seconds)
+        if result is None:
+            print("game over")
+            return
+        move, value, depth = result
+        print("null move %-3s LMR %-3s: depth %d in %gs, %s to %s scores %s" %
+              ("on" if null_move else "off", "on" if lmr else "off", depth, args.seconds,
+               mnk.symbol(player), move, value))
+        print("    depths done at %s, %d nodes, %d null cuts, %d reduced, %d re-searches" %
+              (" ".join("%.2fs" % t for t in search.completed), search.stats.nodes,
+               search.nulls, search.reductions, search.stats.researches))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Proof-number search to solve m,n,k-games
+
+Depth-first proof-number search (df-pn) with a transposition table. A
+proof-number search answers a yes/no question, here "can the attacker force a
+win?", by expanding the most-proving node: the one that most cheaply proves or
+disproves the answer. Unlike alpha-beta it needs no exact score of the
+positions below, so it goes deep into the forcing lines and proves a win
+without searching the whole tree.
+
+The value of a position is found by two searches: first the player to move is
+the attacker, the position is a win if proven. Otherwise the opponent is the
+attacker, the position is a loss if proven and a draw if disproven too.
+
+Each node keeps the proof number (pn) and disproof number (dn) of the answer.
+They are stored as (phi, delta): (pn, dn) at nodes of the attacker to move and
+(dn, pn) at nodes of the defender to move, so that every node minimizes phi
+over the children's delta. The table is a ztable.ZobristTable of fixed size,
+keyed by the Zobrist key of the position: when two positions fall in one slot,
+the one of the smaller searched subtree is dropped, as it is the cheaper to
+search again.
+
+Usage:
+    python3 -m tttai.pns 4 4 4 --table-bits 21
+    python3 -m tttai.pns 3 3 3 --position "X...O...." --player X
+"""
+
+import argparse
+import time
+
+from tttai import mnk, ztable
+from tttai.searchstats import SearchStats
+
+PLAYERS = [1, -1]  # maximizer == 1
+INF = 1 << 30  # proof or disproof number of a solved position
+TABLE_BITS = 21  # log2 of the transposition table size
+ENGINE_BITS = 12  # log2 of the table size of a search of minimax()
+
+Board = mnk.geometry(3, 3, 3)
+
+class Search:
+    """df-pn of whether the attacker can force a win
+
+    Args:
+        attacker: +1 or -1
+        bits: log2 of the transposition table size
+        stats: SearchStats to count into
+    """
+    def __init__(self, attacker, bits=TABLE_BITS, stats=None):
+        self.attacker = attacker
+        self.stats = stats if stats is not None else SearchStats()
+        self.table = ztable.ZobristTable(bits)  # Zobrist key -> (phi, delta, work)
+    def terminal(self, board, player):
+        """(phi, delta) of a finished position of player to move, or None. The
+        position is finished for the attacker when no line is left to win"""
+        winner = board.won()
+        if winner is None and board.spaces() and board.winnable()[0 if self.attacker == 1 else 1]:
+            return None
+        # a draw, or no line left open for the attacker, is a failure of the attacker
+        pn, dn = (0, INF) if winner == self.attacker else (INF, 0)
+        return (pn, dn) if player == self.attacker else (dn, pn)
+    def value(self, board, player):
+        """(phi, delta) of a position from the table, 1 and 1 if not searched"""
+        self.stats.probes += 1
+        entry = self.table.get(board.zkey(player))
+        if entry is None:
+            return self.terminal(board, player) or (1, 1)
+        self.stats.hits += 1
+        return entry[0], entry[1]
+    def store(self, board, player, phi, delta, work):
+        """save a node, unless its slot holds a node of more work"""
+        self.table.put(board.zkey(player), (phi, delta, work), work)
+    def mid(self, board, player, thphi, thdelta, ply=0):
+        """search a position that is not finished until its phi or delta
+        reaches the threshold"""
+        self.stats.visit(ply)
+        self.stats.expanded += 1
+        start = self.stats.expanded
+        children = [board.place(r, c, player) for r, c in board.moves(player)]
+        while True:
+            values = [self.value(child, -player) for child in children]
+            phi = min(d for _, d in values)
+            delta = min(INF, sum(p for p, _ in values))
+            if phi >= thphi or delta >= thdelta:
+                break
+            # the child of smallest delta, and the second smallest delta
+            best = min(range(len(values)), key=lambda n: values[n][1])
+            delta2 = min((values[n][1] for n in range(len(values)) if n != best), default=INF)
+            childphi = values[best][0]
+            self.mid(children[best], -player,
+                     min(INF, thdelta - delta + childphi), min(thphi, delta2 + 1), ply+1)
+        entry = self.table.get(board.zkey(player))
+        work = self.stats.expanded - start + (entry[2] if entry else 0)
+        self.store(board, player, phi, delta, work)
+        return phi, delta
+    def prove(self, board, player):
+        """search until the answer is known
+
+        Returns:
+            (pn, dn) of the position: pn is 0 if the attacker wins, dn is 0
+            otherwise
+        """
+        values = self.terminal(board, player)
+        if values is None:
+            values = self.mid(board, player, INF, INF)
+        return values if player == self.attacker else values[::-1]
+    def best_child(self, board, player):
+        """the move to the child of smallest delta after prove(): a proven win
+        for the attacker, or a disproven one for the defender"""
+        children = [((r, c), child) for r, c in board.moves(player) for child in [board.place(r, c, player)] if child]
+        return min(children, key=lambda pair: self.value(pair[1], -player)[1])[0]
+
+def number(n):
+    """proof or disproof number as text"""
+    return "inf" if n >= INF else str(n)
+
+def solve(board, player, bits=TABLE_BITS):
+    """find the value of a position by two proof-number searches
+
+    Returns:
+        dict of the winner (+1, -1, or 0 for draw), a best move (None if the
+        game is over), and the pn, dn, nodes, table entries, entries replaced
+        and seconds of each search
+    """
+    result = {"searches": []}
+    for attacker in [player, -player]:
+        search = Search(attacker, bits)
+        start = time.perf_counter()
+        pn, dn = search.prove(board, player)
+        result["searches"].append({
+            "attacker": attacker, "pn": pn, "dn": dn, "nodes": search.stats.nodes,
+            "entries": len(search.table), "replaced": search.table.replaced,
+            "seconds": time.perf_counter() - start})
+        finished = board.won() or not board.spaces()
+        if pn == 0 or attacker == -player:
+            result["winner"] = attacker if pn == 0 else 0
+            result["move"] = None if finished else search.best_child(board, player)
+            return result
+
+CACHE = {}
+
+def minimax(board, player, stats=None, ply=0):
+    """exact score of the position as in simple_evaluate: +10 or -10 for a win
+    of X or O, 0 for tie, so the engine registry can use this solver"""
+    if stats is None:
+        stats = SearchStats()
+    stats.probes += 1
+    if (board.board, player) in CACHE:
+        stats.hits += 1
+        return CACHE[(board.board, player)]
+    value = 0
+    for attacker in [player, -player]:
+        pn, _ = Search(attacker, ENGINE_BITS, stats).prove(board, player)
+        if pn == 0:
+            value = 10 * attacker
+            break
+    CACHE[(board.board, player)] = value
+    return value
+
+def main():
+    "parse arguments and solve"
+    parser = argparse.ArgumentParser(description="solve an m,n,k-game by proof-number search")
+    parser.add_argument("rows", type=int, nargs="?", default=4, help="number of rows")
+    parser.add_argument("cols", type=int, nargs="?", default=4, help="number of columns")
+    parser.add_argument("k", type=int, nargs="?", default=4, help="number in a row to win")
+    parser.add_argument("--position", help="row-major cells of X, O and ., default the empty board")
+    parser.add_argument("--player", default="O", choices=["X", "O"], help="player to move, O moves first")
+    parser.add_argument("--table-bits", type=int, default=TABLE_BITS, help="log2 of the transposition table size")
+    args = parser.parse_args()
+    board = mnk.geometry(args.rows, args.cols, args.k)()
+    for (r, c), cell in zip(board.coords, args.position or ""):
+        if cell in "XO":
+            board = board.place(r, c, 1 if cell == "X" else -1)
+    player = 1 if args.player == "X" else -1
+    print(board)
+    result = solve(board, player, args.table_bits)
+    for search in result["searches"]:
+        print("%s attacking: pn %s dn %s, %d nodes, %d entries, %d replaced, %.3fs" %
+              (mnk.symbol(search["attacker"]), number(search["pn"]), number(search["dn"]), search["nodes"],
+               search["entries"], search["replaced"], search["seconds"]))
+    winner = result["winner"]
+    print("%s, best move %s" % ("Tied" if not winner else "%s wins" % mnk.symbol(winner), result["move"]))
+
+if __name__ == "__main__":
+    main()
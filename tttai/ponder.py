@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Human against engine, with the engine searching on the human's time
+
+While the human is thinking at the input() prompt, a background thread
+searches the position after each possible reply of the human. When the human
+moves, the thread is stopped before the engine searches, so the engine reuses
+that work: the transposition table of bitalphabeta.py has the exact value of
+the new position already, and the graph of mctsgraph.py has the playouts of it.
+The tree of mctstree keeps a single root, so it ponders the human's position
+itself, whose children are the replies, and keeps the subtree of the move.
+Engines that keep no state between searches gain nothing from pondering.
+
+Usage:
+    python3 -m tttai.ponder mctsgraph --human O --budget 20000
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from tttai import engine
+
+SLICE = 200  # playouts per position before checking for the human's move
+
+class Ponderer(threading.Thread):
+    """search the positions after each reply of the human until stopped"""
+    def __init__(self, search, board, human, budget):
+        super().__init__(daemon=True)
+        self.search = search
+        self.board = board
+        self.human = human
+        self.budget = budget
+        self.stopping = threading.Event()
+        self.searched = 0  # number of searches done
+    def run(self):
+        children = [self.board | engine.mask(r, c, self.human) for r, c in engine.COORDS
+                    if not self.board & (engine.mask(r, c, 1) | engine.mask(r, c, -1))]
+        positions = [(child, -self.human) for child in children
+                     if not engine.won(child) and engine.spaces(child)]
+        if isinstance(self.search, engine.TreeEngine):
+            positions = [(self.board, self.human)]  # the tree would be cleared for each reply
+        exact = isinstance(self.search, engine.MinimaxEngine)
+        done = 0
+        while positions and not self.stopping.is_set():
+            for position, player in positions:
+                if self.stopping.is_set():
+                    return
+                self.search.best_move(position, player, None if exact else SLICE)
+                self.searched += 1
+            done += SLICE
+            if exact or done >= self.budget:
+                return  # exact values are cached after one pass
+    def stop(self):
+        """stop after the current slice and wait for it"""
+        self.stopping.set()
+        self.join()
+
+def ask(board, human):
+    """read a legal move of the human from the console"""
+    while True:
+        userin = input("Player %s, input coordinate (0-2, 0-2):" % engine.symbol(human))
+        nums = "".join(c if c.isdigit() else ' ' for c in userin).split()
+        if len(nums) != 2:
+            continue
+        row, col = [int(n) for n in nums]
+        if not (0 <= row <= 2 and 0 <= col <= 2):
+            continue
+        if board & (engine.mask(row, col, 1) | engine.mask(row, col, -1)):
+            continue
+        return row, col
+
+def engine_budget(search, board, player, budget):
+    """playouts still to run for a graph or tree search, counting those already
+    in the graph or tree from pondering, or budget for other engines"""
+    if isinstance(search, engine.GraphEngine):
+        visits = search.module.lookup(search.board(board), player).visits
+        return max(1, budget - visits)
+    if isinstance(search, engine.TreeEngine):
+        tree = search.module.TREE
+        node = tree.descendant(search.board(board), player)
+        return budget if node is None else max(1, budget - tree.visits[node])
+    return budget
+
+def play(name, human, budget, ponder=True):
+    "human against engine, O moves first"
+    search = engine.load(name)
+    board = 0
+    player = -1
+    print(engine.show(board))
+    # loop until the game is done
+    while not engine.won(board) and engine.spaces(board):
+        if player == human:
+            ponderer = Ponderer(search, board, human, budget)
+            if ponder:
+                ponderer.start()
+            row, col = ask(board, human)
+            if ponder:
+                ponderer.stop()
+            board |= engine.mask(row, col, player)
+            print("\n%s move, pondered %d searches:" % (engine.symbol(player), ponderer.searched))
+        else:
+            start = time.perf_counter()
+            row, col = search.best_move(board, player, engine_budget(search, board, player, budget))
+            board |= engine.mask(row, col, player)
+            print("\n%s move after %d search steps in %.3fs:" %
+                  (engine.symbol(player), search.stats.nodes, time.perf_counter() - start))
+        print(engine.show(board))
+        player = -player
+    # show result
+    winner = engine.won(board)
+    if not winner:
+        print("\nTied")
+    else:
+        print("\n%s has won" % engine.symbol(winner))
+
+def main():
+    "parse arguments and play"
+    parser = argparse.ArgumentParser(description="play tic-tac-toe against an engine that ponders")
+    parser.add_argument("engine", nargs="?", default="mctsgraph", choices=engine.ENGINES, help="engine to play")
+    parser.add_argument("--human", default="O", choices=["X", "O"], help="side of the human, O moves first")
+    parser.add_argument("--budget", type=int, default=20000, help="playouts per move of monte carlo engines")
+    parser.add_argument("--no-ponder", action="store_true", help="do not search on the human's time")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    play(args.engine, 1 if args.human == "X" else -1, args.budget, not args.no_ponder)
+
+if __name__ == "__main__":
+    main()
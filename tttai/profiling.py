@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Opt-in profiling of the hot paths of tic-tac-toe engines
+
+Instrumentation replaces the engine module's functions and Board methods with
+timed wrappers only inside Profiler.instrument(), and restores the originals
+afterwards, so there is no cost at all when profiling is not enabled. Timers
+are deterministic (every call is timed). Results are per-function totals and
+collapsed stacks, one line per distinct stack with its self time in
+microseconds, as read by flamegraph.pl, speedscope or inferno.
+
+Usage:
+    python3 -m tttai.profiling negascout 10 --totals totals.tsv --collapsed stacks.folded
+"""
+
+import argparse
+import collections
+import contextlib
+import functools
+import importlib
+import random
+import time
+
+# names instrumented if the engine has them
+METHODS = ("won", "place", "check", "spaces", "mask", "winnable", "threats", "moves", "candidates")
+FUNCTIONS = ("play", "evaluate", "simple_evaluate", "heuristic_evaluate",
+             "minimax", "simple_minimax", "alphabeta", "negascout",
+             "mcts", "uct", "mctsgraph", "iterate", "lookup", "expand", "prove", "select", "playout")
+BUILTINS = {"sorted": sorted}  # shadowed by a module global while instrumented
+
+class Profiler:
+    """Collect call counts and times of instrumented functions, in nanoseconds
+
+    Args:
+        fold_recursion: merge consecutive frames of the same function in the
+            collapsed stacks, so recursive search does not make one stack per
+            depth
+    """
+    def __init__(self, fold_recursion=False):
+        self.fold_recursion = fold_recursion
+        self.stack = []  # frames of [name, time spent in children]
+        self.calls = collections.Counter()
+        self.selftime = collections.Counter()
+        self.totaltime = collections.Counter()  # outermost calls only
+        self.collapsed = collections.Counter()
+        self.active = collections.Counter()  # recursion depth of each name
+    def wrap(self, name, func):
+        """timed wrapper of func, reported as name"""
+        stack = self.stack
+        clock = time.perf_counter_ns
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            enter = clock()
+            frame = [name, 0]
+            stack.append(frame)
+            self.active[name] += 1
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                self.record(frame, elapsed)
+                stack.pop()
+                self.active[name] -= 1
+                if stack:
+                    # charge the bookkeeping of this wrapper to the child,
+                    # not to the self time of the caller
+                    stack[-1][1] += clock() - enter
+        return timed
+    def record(self, frame, elapsed):
+        """account a finished call, while its frame is still on the stack"""
+        name = frame[0]
+        selftime = elapsed - frame[1]
+        self.calls[name] += 1
+        self.selftime[name] += selftime
+        if self.active[name] == 1:
+            self.totaltime[name] += elapsed
+        names = [f[0] for f in self.stack]
+        if self.fold_recursion:
+            names = [n for i, n in enumerate(names) if not i or names[i-1] != n]
+        self.collapsed[";".join(names)] += selftime
+    @contextlib.contextmanager
+    def instrument(self, module):
+        """patch the hot paths of an engine module for the duration of the block"""
+        patched = []  # (owner, name, original or None if absent)
+        board = getattr(module, "Board", None)
+        for name in METHODS:
+            if board is not None and callable(getattr(board, name, None)):
+                # an inherited method is wrapped on the subclass and deleted afterwards
+                patched.append((board, name, vars(board).get(name)))
+                setattr(board, name, self.wrap(name, getattr(board, name)))
+        for name in FUNCTIONS:
+            if callable(getattr(module, name, None)):
+                patched.append((module, name, getattr(module, name)))
+                setattr(module, name, self.wrap(name, getattr(module, name)))
+        for name, func in BUILTINS.items():
+            patched.append((module, name, vars(module).get(name)))
+            setattr(module, name, self.wrap(name, func))
+        try:
+            yield self
+        finally:
+            for owner, name, original in reversed(patched):
+                if original is None:
+                    delattr(owner, name)
+                else:
+                    setattr(owner, name, original)
+    def totals(self):
+        """list of (name, calls, total ns, self ns), most self time first"""
+        return sorted(((name, self.calls[name], self.totaltime[name], self.selftime[name])
+                       for name in self.calls), key=lambda row: -row[3])
+    def write_totals(self, path):
+        """tab-separated per-function totals, times in microseconds"""
+        with open(path, "w") as fp:
+            fp.write("function\tcalls\ttotal_us\tself_us\n")
+            for name, calls, total, selftime in self.totals():
+                fp.write("%s\t%d\t%d\t%d\n" % (name, calls, total // 1000, selftime // 1000))
+    def write_collapsed(self, path):
+        """collapsed stacks with self time in microseconds, for flame graphs"""
+        with open(path, "w") as fp:
+            for stack, selftime in sorted(self.collapsed.items()):
+                if selftime >= 1000:
+                    fp.write("%s %d\n" % (stack, selftime // 1000))
+    def __str__(self):
+        lines = ["%-20s %10s %12s %12s" % ("function", "calls", "total ms", "self ms")]
+        for name, calls, total, selftime in self.totals():
+            lines.append("%-20s %10d %12.1f %12.1f" % (name, calls, total / 1e6, selftime / 1e6))
+        return "\n".join(lines)
+
+def main():
+    "profile the play() of an engine"
+    parser = argparse.ArgumentParser(description="profile a tic-tac-toe engine")
+    parser.add_argument("engine", help="engine module, e.g. negascout")
+    parser.add_argument("seed", type=int, help="random seed")
+    parser.add_argument("--totals", help="write per-function totals to this file")
+    parser.add_argument("--collapsed", help="write collapsed stacks to this file")
+    parser.add_argument("--fold-recursion", action="store_true",
+                        help="merge recursive frames in collapsed stacks")
+    args = parser.parse_args()
+    module = importlib.import_module("tttai." + args.engine)
+    profiler = Profiler(args.fold_recursion)
+    random.seed(args.seed)
+    with profiler.instrument(module):
+        module.play()
+    print()
+    print(profiler)
+    if args.totals:
+        profiler.write_totals(args.totals)
+    if args.collapsed:
+        profiler.write_collapsed(args.collapsed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Statistics of a game tree search
+
+A SearchStats object is created for each search and passed down the recursion,
+so concurrent searches do not share counters. Objects from different threads
+or worker processes can be summed into one.
+"""
+
+class SearchStats:
+    """counters of one search"""
+    fields = ("terminals", "expanded", "beta_cutoffs", "alpha_cutoffs",
+              "first_cutoffs", "probes", "hits", "researches")
+    def __init__(self):
+        self.plies = []         # number of nodes searched at each ply
+        self.terminals = 0      # nodes of exact score from evaluate()
+        self.expanded = 0       # nodes that generated children
+        self.beta_cutoffs = 0   # cut-offs at maximizer nodes
+        self.alpha_cutoffs = 0  # cut-offs at minimizer nodes
+        self.first_cutoffs = 0  # cut-offs by the first child searched
+        self.probes = 0         # transposition table lookups
+        self.hits = 0           # transposition table lookups found
+        self.researches = 0     # negascout re-search after zero window fail
+    def visit(self, ply):
+        """count a node searched at ply"""
+        if ply >= len(self.plies):
+            self.plies.extend([0] * (ply + 1 - len(self.plies)))
+        self.plies[ply] += 1
+    def cutoff(self, kind, index):
+        """count a cut-off, kind is "alpha" or "beta" and index is the order of
+        the child that caused it"""
+        if kind == "beta":
+            self.beta_cutoffs += 1
+        else:
+            self.alpha_cutoffs += 1
+        if index == 0:
+            self.first_cutoffs += 1
+    @property
+    def nodes(self):
+        """total number of nodes searched"""
+        return sum(self.plies)
+    @property
+    def cutoffs(self):
+        """total number of alpha and beta cut-offs"""
+        return self.beta_cutoffs + self.alpha_cutoffs
+    @property
+    def first_cutoff_rate(self):
+        """fraction of cut-offs produced by the first child, a measure of
+        move ordering quality"""
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+    @property
+    def hit_rate(self):
+        """fraction of transposition table probes found"""
+        return self.hits / self.probes if self.probes else 0.0
+    @property
+    def branching_factor(self):
+        """effective branching factor: average number of children searched
+        per expanded node"""
+        roots = next((count for count in self.plies if count), 0)
+        children = self.nodes - roots
+        return children / self.expanded if self.expanded else 0.0
+    def merge(self, other):
+        """add the counters of other search into this one, e.g. from workers"""
+        if len(other.plies) > len(self.plies):
+            self.plies.extend([0] * (len(other.plies) - len(self.plies)))
+        for ply, count in enumerate(other.plies):
+            self.plies[ply] += count
+        for name in self.fields:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+    def __add__(self, other):
+        return SearchStats().merge(self).merge(other)
+    def __radd__(self, other):
+        if other == 0:  # to support sum()
+            return SearchStats().merge(self)
+        return NotImplemented
+    def as_dict(self):
+        """all counters and derived figures as a dict, e.g. for JSON"""
+        result = {name: getattr(self, name) for name in self.fields}
+        result.update(plies=list(self.plies), nodes=self.nodes,
+                      first_cutoff_rate=self.first_cutoff_rate,
+                      hit_rate=self.hit_rate,
+                      branching_factor=self.branching_factor)
+        return result
+    def __repr__(self):
+        return "<SearchStats nodes=%d cutoffs=%d first_cutoff_rate=%.2f hit_rate=%.2f branching_factor=%.2f>" % \
+               (self.nodes, self.cutoffs, self.first_cutoff_rate, self.hit_rate, self.branching_factor)
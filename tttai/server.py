@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Long-running analysis server
+
+Engines stay loaded, with their transposition tables and value tables, in a
+pool of worker processes for the life of the server. Clients connect over TCP
+or a Unix socket and send one JSON object per line; each request is answered
+by one JSON line with the same "id", in the order they finish, so a client can
+have many requests in flight on one connection. Requests:
+
+    {"id": 1, "op": "best_move", "engine": "negascout", "position": "XX..O....",
+     "player": "O", "budget": 1000, "timeout": 2.0}
+        -> {"id": 1, "move": [0, 2], "nodes": 12, "seconds": 0.001, "cached": false}
+    {"id": 2, "op": "stats"}
+        -> {"id": 2, "requests": ..., "per_second": ..., "cache_hit_rate": ..., ...}
+    {"id": 3, "op": "ping"}
+        -> {"id": 3, "pong": true}
+
+budget is the number of playouts of monte carlo engines and timeout the
+seconds to wait for the answer, both optional. A timeout only stops the wait:
+a search already running in a worker cannot be interrupted and keeps the
+worker busy until it finishes, only a request still queued is dropped. Answers
+of exact searches are cached by the server, as they do not depend on the
+random seed.
+
+Usage:
+    python3 -m tttai.server --port 8765 --workers 4 --preload negascout mcts
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import time
+
+from tttai import engine
+
+LOADED = {}  # engines loaded in this worker process, by name
+
+def preload(names):
+    """worker initializer: load engines before the first request"""
+    for name in names:
+        LOADED[name] = engine.load(name)
+
+def solve(name, bitboard, player, budget):
+    """search a move in a worker process
+
+    Returns:
+        dict of move, nodes and the transposition table probes and hits
+    """
+    if name not in LOADED:
+        LOADED[name] = engine.load(name)
+    search = LOADED[name]
+    start = time.perf_counter()
+    move = search.best_move(bitboard, player, budget)
+    return {"move": list(move), "nodes": search.stats.nodes, "seconds": time.perf_counter() - start,
+            "probes": search.stats.probes, "hits": search.stats.hits}
+
+class Server:
+    """request handling and statistics of the analysis server"""
+    def __init__(self, workers=None, names=(), timeout=10.0):
+        self.pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=preload,
+                                                           initargs=(list(names),))
+        self.timeout = timeout
+        self.results = {}  # (engine, bitboard, player) -> answer of exact searches
+        self.started = time.monotonic()
+        self.requests = self.answered = self.errors = self.timeouts = 0
+        self.cache_hits = self.probes = self.hits = self.nodes = 0
+        self.busy = 0.0  # total search seconds in workers
+    def stats(self):
+        """throughput and cache figures since start"""
+        uptime = time.monotonic() - self.started
+        return {"uptime": uptime, "requests": self.requests, "answered": self.answered,
+                "errors": self.errors, "timeouts": self.timeouts,
+                "per_second": self.answered / uptime if uptime else 0.0,
+                "nodes": self.nodes, "search_seconds": self.busy,
+                "cache_hit_rate": self.cache_hits / self.answered if self.answered else 0.0,
+                "table_hit_rate": self.hits / self.probes if self.probes else 0.0}
+    async def best_move(self, request):
+        """answer a best_move request from the cache or a worker"""
+        name = request["engine"]
+        if name not in engine.ENGINES:
+            raise ValueError("unknown engine %r" % name)
+        text = request["position"]
+        if len(text) != 9 or set(text) - set("XO."):
+            raise ValueError("bad position %r" % text)
+        bitboard = engine.parse(text)
+        player = {"X": 1, "O": -1, 1: 1, -1: -1}[request["player"]]
+        if engine.won(bitboard) or not engine.spaces(bitboard):
+            raise ValueError("game over in position %r" % text)
+        exact = engine.ENGINES[name][1] is engine.MinimaxEngine
+        key = (name, bitboard, player)
+        if exact and key in self.results:
+            self.cache_hits += 1
+            return dict(self.results[key], cached=True)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, solve, name, bitboard, player, request.get("budget"))
+        # the worker cannot be interrupted: on timeout it finishes in background
+        answer = await asyncio.wait_for(future, request.get("timeout", self.timeout))
+        self.nodes += answer["nodes"]
+        self.busy += answer["seconds"]
+        self.probes += answer.pop("probes")
+        self.hits += answer.pop("hits")
+        if exact:
+            self.results[key] = answer
+        return dict(answer, cached=False)
+    async def dispatch(self, line):
+        """answer one request line"""
+        self.requests += 1
+        reply = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request is not a JSON object")
+            reply["id"] = request.get("id")
+            op = request.get("op", "best_move")
+            if op == "best_move":
+                reply.update(await self.best_move(request))
+            elif op == "stats":
+                reply.update(self.stats())
+            elif op == "ping":
+                reply["pong"] = True
+            else:
+                raise ValueError("unknown op %r" % op)
+            self.answered += 1
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            reply["error"] = "timeout"
+        except (ValueError, KeyError, TypeError) as error:
+            self.errors += 1
+            reply["error"] = str(error)
+        return reply
+    async def handle(self, reader, writer):
+        """serve one connection, requests on it are answered concurrently"""
+        async def respond(line):
+            reply = await self.dispatch(line)
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        writer.close()
+    def close(self):
+        self.pool.shutdown()
+
+async def serve(server, host="127.0.0.1", port=8765, path=None):
+    """listen on TCP host and port, or on the Unix socket path"""
+    if path:
+        listener = await asyncio.start_unix_server(server.handle, path)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    async with listener:
+        await listener.serve_forever()
+
+def main():
+    "run the server until interrupted"
+    parser = argparse.ArgumentParser(description="tic-tac-toe analysis server")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address to listen")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port to listen")
+    parser.add_argument("--unix", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="number of processes, default all CPUs")
+    parser.add_argument("--preload", nargs="*", default=[], choices=engine.ENGINES,
+                        help="engines to load in workers at start")
+    parser.add_argument("--timeout", type=float, default=10.0, help="default seconds to wait for an answer")
+    args = parser.parse_args()
+    server = Server(args.workers, args.preload, args.timeout)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Full-game solver of small m,n,k-games, sharded and resumable
+
+The game tree is split at a depth of a few plies: each position at that depth,
+up to symmetry, is a shard, solved by exact minimax in a process pool. A
+worker keeps the transposition table of its shard in a ttfile.DiskCache and
+saves it every few minutes as a checkpoint, which also moves the table out of
+memory. When a shard is solved, its value and best move are written to a
+result file of its own and the checkpoint is removed. An interrupted run is
+resumed by running the same command again: solved shards are skipped and the
+others continue from their checkpoint.
+
+When all shards are solved, the positions above the split are solved from the
+shard values, and the value and best move of each position at and above the
+split depth are written to solution.txt, one line of row-major cells, side to
+move, value (+10 for X wins, -10 for O wins, 0 for tie) and best move row,col,
+as analyze.py does. Positions inside the shards are not written. Positions are
+up to symmetry and O moves first.
+
+Usage:
+    python3 -m tttai.shardsolve 4 4 4 --depth 2 --dir solve444
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+
+from tttai import mnk, ttfile
+
+EVALUATOR = "shardsolve"
+CHECKPOINT = 300  # seconds between saves of the table of a shard
+
+class Shard:
+    """exact minimax of one shard with a checkpointed transposition table
+
+    Args:
+        board: the Board of the shard, of a geometry from mnk.geometry()
+        path: checkpoint file of the table, loaded if it exists
+        interval: seconds between checkpoints
+    """
+    def __init__(self, board, path, interval=CHECKPOINT):
+        self.board = board
+        self.cache = ttfile.DiskCache(path, (board.rows, board.cols, board.k), EVALUATOR)
+        self.interval = interval
+        self.deadline = time.monotonic() + interval
+        self.nodes = 0
+    def checkpoint(self):
+        """save the table to the file"""
+        self.cache.save()
+        self.deadline = time.monotonic() + self.interval
+    def minimax(self, board, player):
+        """exact score of the position, searching the children until one
+        reaches the best score still possible for player"""
+        key = (board.board, player)
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+        self.nodes += 1
+        winner = board.won()
+        if winner:
+            return 10 * winner
+        xcan, ocan = board.winnable()
+        if not board.spaces() or not (xcan or ocan):
+            return 0
+        best = 10 * player if (xcan if player == 1 else ocan) else 0
+        value = None
+        for r, c in board.moves(player):
+            score = self.minimax(board.place(r, c, player), -player)
+            if value is None or player * score > player * value:
+                value = score
+            if value == best:
+                break
+        self.cache[key] = value
+        if self.nodes % 4096 == 0 and time.monotonic() >= self.deadline:
+            self.checkpoint()
+        return value
+    def solve(self, player):
+        """the value and a best move (row, col) of the shard position"""
+        value = move = None
+        for r, c in self.board.moves(player):
+            score = self.minimax(self.board.place(r, c, player), -player)
+            if value is None or player * score > player * value:
+                value, move = score, (r, c)
+        return value, move
+
+def solve_shard(job):
+    """solve one shard in a worker and write its result file
+
+    Args:
+        job: tuple of geometry, directory, shard number, cells text, player,
+            seconds between checkpoints
+    Returns:
+        the result as a dict
+    """
+    geometry, directory, number, text, player, interval = job
+    board = mnk.parse(mnk.geometry(*geometry), text)
+    path = os.path.join(directory, "shard-%05d" % number)
+    start = time.perf_counter()
+    shard = Shard(board, path + ".bin", interval)
+    resumed = len(shard.cache)
+    value, move = shard.solve(player)
+    result = {"shard": number, "cells": text, "player": player, "value": value, "move": move,
+              "nodes": shard.nodes, "resumed": resumed, "seconds": time.perf_counter() - start}
+    with open(path + ".tmp", "w") as fp:
+        json.dump(result, fp)
+    os.replace(path + ".tmp", path + ".json")  # the shard is done once this exists
+    shard.cache.close()
+    if os.path.exists(path + ".bin"):
+        os.remove(path + ".bin")
+    return result
+
+def finished(board):
+    """the exact score of a position where the game is over or no one can win,
+    or None"""
+    winner = board.won()
+    if winner:
+        return 10 * winner
+    if not board.spaces() or board.winnable() == (False, False):
+        return 0
+
+def split(cls, depth):
+    """the positions above the split and the shards, up to symmetry
+
+    Returns:
+        list of (board, player) of less than depth stones, and list of
+        (board, player) of depth stones where the game goes on
+    """
+    above, level = [], [(cls(), -1)]
+    for _ in range(depth):
+        nextlevel = {}
+        for board, player in level:
+            above.append((board, player))
+            if finished(board) is not None:
+                continue
+            for r, c in board.moves(player):
+                child = mnk.canonical(board.place(r, c, player))[0]
+                nextlevel[child.board] = (child, -player)
+        level = [pair for _, pair in sorted(nextlevel.items())]
+    shards = [(board, player) for board, player in level if finished(board) is None]
+    above.extend((board, player) for board, player in level if finished(board) is not None)
+    return above, shards
+
+def merge(above, results):
+    """solve the positions above the split from the shard results
+
+    Args:
+        above: positions from split(), parents before children
+        results: {(bitboard, player): (value, move)} of the shards
+    Returns:
+        results with the positions above the split added
+    """
+    for board, player in reversed(above):
+        value = finished(board)
+        if value is not None:
+            results[(board.board, player)] = (value, None)
+            continue
+        best = None
+        for r, c in board.moves(player):
+            child = mnk.canonical(board.place(r, c, player))[0]
+            score = results[(child.board, -player)][0]
+            if best is None or player * score > player * best[0]:
+                best = (score, (r, c))
+        results[(board.board, player)] = best
+    return results
+
+def resume(directory, manifest):
+    """check the run in directory is of the same geometry and depth, and read
+    the results of the shards already solved"""
+    path = os.path.join(directory, "manifest.json")
+    if os.path.exists(path):
+        with open(path) as fp:
+            if json.load(fp) != manifest:
+                raise ValueError("%s is a run of other geometry or depth" % directory)
+    else:
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as fp:
+            json.dump(manifest, fp)
+    results = []
+    for name in sorted(glob.glob(os.path.join(directory, "shard-*.json"))):
+        with open(name) as fp:
+            results.append(json.load(fp))
+    return results
+
+def shardsolve(rows, cols, k, depth, directory, workers=None, interval=CHECKPOINT):
+    """solve the game from the empty board, O to move
+
+    Returns:
+        dict of (bitboard, player) to (value, move) of all positions above and
+        at the split, up to symmetry
+    """
+    cls = mnk.geometry(rows, cols, k)
+    above, shards = split(cls, depth)
+    records = resume(directory, {"rows": rows, "cols": cols, "k": k, "depth": depth})
+    done = {record["shard"] for record in records}
+    jobs = [((rows, cols, k), directory, number, board.text(), player, interval)
+            for number, (board, player) in enumerate(shards) if number not in done]
+    print("%d shards, %d solved before" % (len(shards), len(done)))
+    with multiprocessing.Pool(workers) as pool:
+        for record in pool.imap_unordered(solve_shard, jobs):
+            records.append(record)
+            print("%d/%d shards, shard %d: %d nodes in %.1fs" %
+                  (len(records), len(shards), record["shard"], record["nodes"], record["seconds"]))
+    results = {(mnk.parse(cls, record["cells"]).board, record["player"]):
+               (record["value"], tuple(record["move"])) for record in records}
+    return merge(above, results)
+
+def write_solution(path, cls, results):
+    """write the value and best move of each position, fewest stones first"""
+    with open(path, "w") as fp:
+        positions = sorted(results, key=lambda key: (bin(key[0]).count("1"), key))
+        for bitboard, player in positions:
+            value, move = results[(bitboard, player)]
+            line = "%s %s %d" % (cls(bitboard).text(), mnk.symbol(player), value)
+            fp.write(line + (" %d,%d\n" % move if move else "\n"))
+
+def main():
+    "parse arguments and solve"
+    parser = argparse.ArgumentParser(description="sharded, resumable solver of an m,n,k-game")
+    parser.add_argument("rows", type=int, help="number of rows")
+    parser.add_argument("cols", type=int, help="number of columns")
+    parser.add_argument("k", type=int, help="number in a row to win")
+    parser.add_argument("--depth", type=int, default=2, help="plies before the split into shards")
+    parser.add_argument("--dir", required=True, help="directory of shard results and checkpoints, resumed if exists")
+    parser.add_argument("--workers", type=int, help="number of processes, default all CPUs")
+    parser.add_argument("--checkpoint", type=float, default=CHECKPOINT, help="seconds between checkpoints of a shard")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    results = shardsolve(args.rows, args.cols, args.k, args.depth, args.dir, args.workers, args.checkpoint)
+    cls = mnk.geometry(args.rows, args.cols, args.k)
+    write_solution(os.path.join(args.dir, "solution.txt"), cls, results)
+    value, move = results[(0, -1)]
+    print("%s, best first move %s, %.1fs" %
+          ("Tied" if not value else "%s wins" % mnk.symbol(value // 10), move, time.perf_counter() - start))
+
+if __name__ == "__main__":
+    main()
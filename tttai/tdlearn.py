@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tic-tac-toe value function learned by self-play with TD(0)
+
+The value table is indexed by the bitboard and the player to move, and holds
+the expected outcome from the view of X (+1 for X won, -1 for O won, 0 for
+tie). It is a flat array of 2^19 float32, saved to disk as raw bytes, that
+MCTS can look up in place of a random playout.
+"""
+
+import array
+import random
+import sys
+
+PLAYERS = [1, -1]  # maximizer == 1
+COORDS = [(r, c) for r in range(3) for c in range(3)]
+
+class Board:
+    """bit-vector based tic-tac-toe board"""
+    def __init__(self, board=0):
+        self.board = board
+    def mask(self, row, col, player):
+        """Produce the bitmask for row and col
+        The 18-bit vector is row-major, with matrix cell (0,0) the MSB. And the
+        higher 9-bit is for 1 (X) and lower 9-bit is for -1 (O)
+
+        Args:
+            row, col: integers from 0 to 2 inclusive
+        """
+        offset = 3*(2-row) + (2-col)
+        if player == 1:
+            offset += 9
+        return 1 << offset
+    def place(self, row, col, player):
+        """produce a new board with row and col set to a symbol. Return None if
+        some symbol already set.
+
+        Args:
+            what: either +1 or -1
+        """
+        assert player in PLAYERS
+        mask = self.mask(row, col, player)
+        othermask = self.mask(row, col, -player)
+        if (mask | othermask) & self.board:
+            return None  # something already on this position
+        return Board(self.board | mask)
+    masks = (0b000000111, 0b000111000, 0b111000000, # rows
+             0b001001001, 0b010010010, 0b100100100, # cols
+             0b100010001, 0b001010100               # diags
+            )
+    def won(self):
+        """check winner. Return the winner (+1 or -1) or None"""
+        shifted = self.board >> 9
+        for mask in self.masks:
+            if self.board & mask == mask:
+                return -1
+            if shifted & mask == mask:
+                return 1
+
+ALPHA = 0.1  # TD learning rate
+EPSILON = 0.1  # probability of exploratory move in self-play
+SIZE = 1 << 19  # 18-bit bitboard and 1 bit for the player to move
+
+def new_table():
+    """value table of all zero"""
+    return array.array("f", bytes(4 * SIZE))
+
+def value(table, board, player):
+    """look up the value of a position with player to move, from the view of X"""
+    return table[board.board << 1 | (player == -1)]
+
+def outcome(board):
+    """exact value of a finished game from the view of X, None if not finished"""
+    winner = board.won()
+    if winner:
+        return float(winner)
+    if (board.board | board.board >> 9) & 0b111111111 == 0b111111111:
+        return 0.0  # board full
+
+def selfplay(table):
+    """play one game against itself with epsilon-greedy moves on the table,
+    updating the value of each position toward the value of its successor
+
+    Returns:
+        the sum of squared TD errors of the game
+    """
+    board = Board()
+    player = random.choice(PLAYERS)
+    error = 0.0
+    while True:
+        children = [b for b in [board.place(r, c, player) for r, c in COORDS] if b]
+        if random.random() < EPSILON:
+            child = random.choice(children)
+        else:
+            random.shuffle(children)  # break ties randomly
+            child = max(children, key=lambda b: player * value(table, b, -player))
+        target = outcome(child)
+        final = target is not None
+        if not final:
+            target = value(table, child, -player)
+        index = board.board << 1 | (player == -1)
+        delta = target - table[index]
+        table[index] += ALPHA * delta
+        error += delta * delta
+        if final:
+            return error
+        board, player = child, -player
+
+def train(table, games):
+    """run self-play games, print the mean squared TD error periodically"""
+    error = 0.0
+    for n in range(1, games+1):
+        error += selfplay(table)
+        if n % 10000 == 0:
+            print("%d games, mean squared TD error %f" % (n, error / 10000))
+            error = 0.0
+    return table
+
+def save(table, path):
+    """write the value table as raw float32"""
+    with open(path, "wb") as fp:
+        table.tofile(fp)
+
+def load(path):
+    """read the value table written by save()"""
+    table = array.array("f")
+    with open(path, "rb") as fp:
+        table.fromfile(fp, SIZE)
+    return table
+
+if __name__ == "__main__":
+    # usage: tdlearn.py seed games output
+    random.seed(int(sys.argv[1]))
+    save(train(new_table(), int(sys.argv[2])), sys.argv[3])
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Self-play tournament between two engines
+
+Games are played in a process pool, each with its own random seed, and with
+the engines alternating colours (engine A plays X in even numbered games). As
+O moves first, each engine moves first in half of the games. Every finished
+game is appended to a JSONL file at once, so an interrupted run can be resumed
+by running the same command again: games already in the file are skipped. The
+file must be of the same match, the same engines A and B, seed and budget.
+
+Usage:
+    python3 -m tttai.tournament negascout mcts --games 1000 --output games.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from tttai import engine, gamerecord
+
+LOADED = {}  # engines loaded in this worker process, by name
+
+def play_game(job):
+    """play one game in a worker
+
+    Args:
+        job: tuple of game number, seed, engine names of X and O, and budget
+    Returns:
+        the record of the game as a dict
+    """
+    game, seed, xname, oname, budget = job
+    engines = {}
+    for player, name in [(1, xname), (-1, oname)]:
+        if name not in LOADED:
+            LOADED[name] = engine.load(name)
+        engines[player] = LOADED[name]
+        engines[player].reset()  # games are reproducible from the seed alone
+    random.seed(seed)
+    board = 0
+    player = -1
+    moves, times = [], []
+    while not engine.won(board) and engine.spaces(board):
+        start = time.perf_counter()
+        row, col = engines[player].best_move(board, player, budget)
+        times.append(time.perf_counter() - start)
+        moves.append([row, col])
+        board |= engine.mask(row, col, player)
+        player = -player
+    return {"game": game, "seed": seed, "x": xname, "o": oname, "budget": budget,
+            "moves": moves, "times": times, "winner": engine.won(board) or 0}
+
+def score(record, name):
+    """score of engine name in a game: 1 for win, 0.5 for tie, 0 for loss"""
+    if not record["winner"]:
+        return 0.5
+    winner = record["x"] if record["winner"] == 1 else record["o"]
+    return 1.0 if winner == name else 0.0
+
+def elo(fraction):
+    """Elo difference of a score fraction"""
+    if fraction <= 0:
+        return -float("inf")
+    if fraction >= 1:
+        return float("inf")
+    return -400 * math.log10(1 / fraction - 1)
+
+def summary(records, name):
+    """win/tie/loss of engine name, its Elo difference against the opponent
+    and the 95% confidence interval of the difference, of at least one game"""
+    scores = [score(record, name) for record in records]
+    n = len(scores)
+    mean = sum(scores) / n
+    stderr = math.sqrt(sum((s - mean)**2 for s in scores) / n / n)
+    return {
+        "games": n,
+        "wins": scores.count(1.0),
+        "ties": scores.count(0.5),
+        "losses": scores.count(0.0),
+        "score": mean,
+        "elo": elo(mean),
+        "elo_low": elo(mean - 1.96 * stderr),
+        "elo_high": elo(mean + 1.96 * stderr),
+    }
+
+def job(game, seed, aname, bname, budget):
+    """the job of play_game() for a game number of a match"""
+    if game % 2:
+        aname, bname = bname, aname  # engine A plays X in even numbered games
+    return game, seed + game, aname, bname, budget
+
+def resume(path, aname, bname, seed, budget):
+    """read the finished games of an earlier run, dropping a partly written
+    last line, and check that they are games of the same match"""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "rb+") as fp:
+        data = fp.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            fp.truncate(end)  # interrupted in the middle of a write
+    for line in data[:end].decode().splitlines():
+        record = json.loads(line)
+        game, gameseed, xname, oname, gamebudget = job(record["game"], seed, aname, bname, budget)
+        if (record["seed"], record["x"], record["o"], record["budget"]) != (gameseed, xname, oname, gamebudget):
+            raise ValueError("%s has game %d of %s vs %s with seed %s and budget %s, not of this match" %
+                             (path, game, record["x"], record["o"], record["seed"], record["budget"]))
+        records.append(record)
+    return records
+
+def tournament(aname, bname, games, seed, output, workers=None, budget=None, records_path=None):
+    """play the games not yet in output, appending each as it finishes, and
+    to the gamerecord file records_path if given
+
+    Returns:
+        list of the records of games 0 to games-1, including those of earlier
+        runs
+    """
+    records = [record for record in resume(output, aname, bname, seed, budget) if record["game"] < games]
+    done = {record["game"] for record in records}
+    jobs = [job(game, seed, aname, bname, budget) for game in range(games) if game not in done]
+    with open(output, "a") as fp, multiprocessing.Pool(workers) as pool, \
+            (gamerecord.RecordWriter(records_path) if records_path else contextlib.nullcontext()) as writer:
+        for record in pool.imap_unordered(play_game, jobs):
+            fp.write(json.dumps(record) + "\n")
+            fp.flush()
+            if writer:
+                # flushed with the JSONL line, so an interrupted run loses no game of either file
+                writer.write(record["moves"], record["winner"], sum(record["times"]))
+                writer.flush()
+            records.append(record)
+            if len(records) % 100 == 0:
+                print("%d/%d games" % (len(records), games))
+    return records
+
+def main():
+    "run a tournament and print the result of engine A"
+    parser = argparse.ArgumentParser(description="tournament between two tic-tac-toe engines")
+    parser.add_argument("a", choices=engine.ENGINES, help="engine A")
+    parser.add_argument("b", choices=engine.ENGINES, help="engine B")
+    parser.add_argument("--games", type=int, default=100, help="number of games")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the first game")
+    parser.add_argument("--workers", type=int, help="number of processes, default all CPUs")
+    parser.add_argument("--budget", type=int, help="playouts per move of monte carlo engines")
+    parser.add_argument("--output", required=True, help="JSONL file of games, resumed if exists")
+    parser.add_argument("--records", help="binary record file to append the new games to")
+    args = parser.parse_args()
+    records = tournament(args.a, args.b, args.games, args.seed, args.output, args.workers, args.budget,
+                         args.records)
+    if not records:
+        print("%s vs %s: no records" % (args.a, args.b))
+        return
+    result = summary(records, args.a)
+    movetimes = sorted(t for record in records for t in record["times"])
+    print("%s vs %s: %d games, +%d =%d -%d, score %.3f" %
+          (args.a, args.b, result["games"], result["wins"], result["ties"], result["losses"], result["score"]))
+    print("Elo difference %+.0f, 95%% confidence interval [%+.0f, %+.0f]" %
+          (result["elo"], result["elo_low"], result["elo_high"]))
+    if movetimes:
+        print("median move time %.4fs" % movetimes[len(movetimes) // 2])
+
+if __name__ == "__main__":
+    main()
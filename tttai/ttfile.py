@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Transposition table persisted in a binary file
+
+The file is a header followed by fixed-size records of key and value, sorted by
+key. The key packs the bitboard and the player to move as bitboard << 1 | (1 if
+O to move), in 32 bits, or 64 bits for boards of more than 15 cells. The value
+is the cached score. The file is memory-mapped and looked up by binary
+search, so opening it costs nothing until positions are probed, and only the
+probed pages are read from disk.
+
+The header holds the board geometry (rows, cols, k in a row) and the name of
+the evaluator. A file of any other geometry, evaluator or format version is
+ignored, as its scores would be wrong for the engine.
+"""
+
+import mmap
+import os
+import struct
+
+MAGIC = b"TTTC"
+VERSION = 1
+HEADER = struct.Struct("<4sHBBB32sI")  # magic, version, rows, cols, k, evaluator, count
+RECORD = struct.Struct("<Ih")  # key, value
+WIDE_RECORD = struct.Struct("<Qh")  # key, value of boards over 15 cells
+
+def pack_key(key):
+    """record key of a (bitboard, player) cache key"""
+    bitboard, player = key
+    return bitboard << 1 | (player == -1)
+
+def unpack_key(packed):
+    """(bitboard, player) cache key of a record key"""
+    return packed >> 1, -1 if packed & 1 else 1
+
+def record(geometry):
+    """record format of a geometry, the key takes 2 bits a cell and 1 bit for
+    the player"""
+    rows, cols, _ = geometry
+    bits = 2 * rows * cols + 1
+    if bits > 64:
+        raise ValueError("board of %dx%d too large for the cache file" % (rows, cols))
+    return RECORD if bits <= 32 else WIDE_RECORD
+
+class DiskCache:
+    """Dict-like cache of (bitboard, player) to score, backed by a file
+
+    New entries are kept in memory until save(). Entries found in the file are
+    copied into memory so that a lookup after a `in` test is not repeated.
+
+    Args:
+        path: the cache file, need not exist
+        geometry: tuple of rows, cols, and k in a row
+        evaluator: name of the evaluation function the scores are based on
+    """
+    def __init__(self, path, geometry, evaluator):
+        self.path = path
+        self.header = (MAGIC, VERSION) + tuple(geometry) + (evaluator.encode()[:32],)
+        self.record = record(geometry)
+        self.memory = {}
+        self.fp = self.mm = None
+        self.count = 0
+        self.open()
+    def open(self):
+        """map the file if it exists and matches the geometry and evaluator"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            return
+        self.fp = open(self.path, "rb")
+        self.mm = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = HEADER.unpack_from(self.mm, 0)
+        header = fields[:5] + (fields[5].rstrip(b"\0"),)
+        count = fields[6]
+        if header != self.header or len(self.mm) != HEADER.size + count * self.record.size:
+            self.close()  # other version or geometry, or truncated file
+            return
+        self.count = count
+    def close(self):
+        """unmap the file, the entries in memory are kept"""
+        if self.mm is not None:
+            self.mm.close()
+            self.fp.close()
+        self.fp = self.mm = None
+        self.count = 0
+    def find(self, packed):
+        """binary search of a record key in the file, the value or None"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            key, value = self.record.unpack_from(self.mm, HEADER.size + mid * self.record.size)
+            if key == packed:
+                return value
+            if key < packed:
+                low = mid + 1
+            else:
+                high = mid
+        return None
+    def get(self, key, default=None):
+        if key in self.memory:
+            return self.memory[key]
+        if self.count:
+            value = self.find(pack_key(key))
+            if value is not None:
+                self.memory[key] = value
+                return value
+        return default
+    def __contains__(self, key):
+        return self.get(key) is not None
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+    def __setitem__(self, key, value):
+        self.memory[key] = value
+    def __len__(self):
+        return self.count + sum(1 for key in self.memory if self.count == 0 or self.find(pack_key(key)) is None)
+    def clear(self):
+        """forget all entries, including those in the file until save()"""
+        self.memory.clear()
+        self.close()
+    def items(self):
+        """all entries, file entries first"""
+        for n in range(self.count):
+            key, value = self.record.unpack_from(self.mm, HEADER.size + n * self.record.size)
+            yield unpack_key(key), value
+        yield from self.memory.items()
+    def save(self):
+        """merge the entries in memory into the file, and map it again"""
+        records = {pack_key(key): value for key, value in self.items()}
+        temp = self.path + ".tmp"
+        with open(temp, "wb") as fp:
+            fp.write(HEADER.pack(*self.header, len(records)))
+            fp.write(b"".join(self.record.pack(key, records[key]) for key in sorted(records)))
+        self.close()
+        os.replace(temp, self.path)  # readers never see a partial file
+        self.memory.clear()
+        self.open()
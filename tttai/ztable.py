@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Transposition table of fixed size keyed by 64-bit Zobrist keys
+
+The table is an array of 2**bits slots in buckets of two. A position goes to
+the bucket of the low bits of its key, and the high check_bits of the key are
+stored in the slot to verify it: a probe of another position that maps to the
+same bucket is a miss, counted as a collision, instead of returning the other
+position's value. Two positions are confused only if bits - 1 + check_bits of
+their keys are equal.
+
+A new position always gets a slot of its bucket: when both are taken, it
+replaces the one of less work (the size of the subtree searched to get the
+value), as that is the cheaper to redo. A search that stores a position
+expects to read it back, so a store is never refused.
+
+Run as a script, it measures the cost of a probe, and the memory of an entry,
+against a dict keyed by the (bitboard, player) int, on the positions of random
+games. The table has memory fixed by bits, the dict grows with the search. In
+CPython the dict is the faster to probe, as hashing an int is cheap and the
+table spends Python code on the slot and check; what the table buys is the
+fixed memory, and a key of 64 bits however large the board.
+
+Usage:
+    python3 -m tttai.ztable 15 15 5 --games 200
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from array import array
+
+from tttai import mnk
+
+class ZobristTable:
+    """fixed-size table of Zobrist key to value
+
+    Args:
+        bits: log2 of the number of slots
+        check_bits: number of high bits of the key stored to verify a slot
+    """
+    def __init__(self, bits=20, check_bits=32):
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.shift = 64 - check_bits
+        self.checks = array("Q", bytes(8 * self.size))
+        self.works = array("Q", bytes(8 * self.size))
+        self.values = [None] * self.size
+        self.count = 0
+        self.probes = self.hits = self.collisions = self.replaced = 0
+    def find(self, key):
+        """the slot of key, or None if not in the table"""
+        slot = key & self.mask
+        check = key >> self.shift
+        for slot in (slot, slot ^ 1):
+            if self.values[slot] is not None and self.checks[slot] == check:
+                return slot
+    def get(self, key, default=None):
+        """the value of key, or default if not in the table"""
+        self.probes += 1
+        slot = self.find(key)
+        if slot is None:
+            if self.values[key & self.mask] is not None:
+                self.collisions += 1  # another position in the bucket
+            return default
+        self.hits += 1
+        return self.values[slot]
+    def put(self, key, value, work=0):
+        """store the value of key, in place of the position of less work in
+        its bucket if both slots are taken"""
+        slot = self.find(key)
+        if slot is None:
+            slot = key & self.mask
+            other = slot ^ 1
+            if self.values[slot] is not None and (self.values[other] is None or
+                                                  self.works[other] < self.works[slot]):
+                slot = other
+            if self.values[slot] is None:
+                self.count += 1
+            else:
+                self.replaced += 1
+        self.checks[slot] = key >> self.shift
+        self.works[slot] = work
+        self.values[slot] = value
+    def __len__(self):
+        return self.count
+    def clear(self):
+        self.values = [None] * self.size
+        self.count = 0
+
+def random_walks(cls, games, rng):
+    """(board, player) of the positions of random games, where each child is
+    made by place() from its parent"""
+    positions = []
+    for _ in range(games):
+        board, player = cls(), -1
+        cells = list(cls.coords)
+        rng.shuffle(cells)
+        for r, c in cells:
+            board = board.place(r, c, player)
+            player = -player
+            positions.append((board, player))
+            if board.won():
+                break
+    return positions
+
+def fill_dict(positions):
+    """probe and store the positions in a dict keyed by (bitboard, player)"""
+    table = {}
+    for board, player in positions:
+        key = (board.board, player)
+        if table.get(key) is None:
+            table[key] = 0
+    return table
+
+def fill_zobrist(positions, table):
+    """probe and store the positions in a ZobristTable"""
+    for board, player in positions:
+        key = board.zkey(player)
+        if table.get(key) is None:
+            table.put(key, 0)
+    return table
+
+def benchmark(rows, cols, k, games, bits, seed=0):
+    """seconds per probe-and-store of a dict keyed by (bitboard, player) and
+    of a ZobristTable keyed by Zobrist key, the bytes per entry of the dict and
+    per slot of the table, over the positions of random games played twice, so
+    half of the probes hit"""
+    cls = mnk.geometry(rows, cols, k)
+    positions = random_walks(cls, games, random.Random(seed))
+    positions += positions
+    result = {"positions": len(positions)}
+    start = time.perf_counter()
+    fill_dict(positions)
+    result["dict"] = (time.perf_counter() - start) / len(positions)
+    ztable = ZobristTable(bits)
+    start = time.perf_counter()
+    fill_zobrist(positions, ztable)
+    result["zobrist"] = (time.perf_counter() - start) / len(positions)
+    result.update(hits=ztable.hits, collisions=ztable.collisions, replaced=ztable.replaced)
+    # memory, measured apart as tracing slows down allocation
+    tracemalloc.start()
+    table = fill_dict(positions)
+    result["dict_bytes"] = tracemalloc.get_traced_memory()[0] / len(table)
+    del table
+    tracemalloc.stop()
+    tracemalloc.start()
+    table = fill_zobrist(positions, ZobristTable(bits))
+    result["zobrist_bytes"] = tracemalloc.get_traced_memory()[0] / table.size
+    result["load"] = len(table) / table.size
+    tracemalloc.stop()
+    # cost of hashing the bitboard int, where place() updates the Zobrist key by one XOR
+    board = positions[-1][0]
+    start = time.perf_counter()
+    for _ in range(len(positions)):
+        hash((board.board, 1))
+    result["int_hash"] = (time.perf_counter() - start) / len(positions)
+    return result
+
+def main():
+    "parse arguments and run the benchmark"
+    parser = argparse.ArgumentParser(description="probe cost of Zobrist keys against int keys")
+    parser.add_argument("rows", type=int, nargs="?", default=15, help="number of rows")
+    parser.add_argument("cols", type=int, nargs="?", default=15, help="number of columns")
+    parser.add_argument("k", type=int, nargs="?", default=5, help="number in a row to win")
+    parser.add_argument("--games", type=int, default=200, help="number of random games")
+    parser.add_argument("--bits", type=int, default=20, help="log2 of the Zobrist table size")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+    result = benchmark(args.rows, args.cols, args.k, args.games, args.bits, args.seed)
+    print("%d probes on %dx%d k=%d" % (result["positions"], args.rows, args.cols, args.k))
+    print("dict of (bitboard, player): %.3f us per probe, %.0f bytes per entry" %
+          (result["dict"] * 1e6, result["dict_bytes"]))
+    print("Zobrist table:              %.3f us per probe, %.0f bytes per slot, %.0f%% slots used" %
+          (result["zobrist"] * 1e6, result["zobrist_bytes"], result["load"] * 100))
+    print("Zobrist table: %d hits, %d collisions caught by the check bits, %d entries replaced" %
+          (result["hits"], result["collisions"], result["replaced"]))
+    print("hash of the bitboard int:   %.3f us" % (result["int_hash"] * 1e6))
+
+if __name__ == "__main__":
+    main()